@@ -0,0 +1,236 @@
+"""Procedural sound synthesis with an on-disk sample cache.
+
+Every effect blip, note and the background loop is built by the same
+vectorized NumPy path. Rendered samples are saved as .npy files keyed by
+their synthesis parameters, so later launches just memory-map them instead
+of synthesizing again.
+
+AudioEngine streams everything through a single mixer channel instead: a
+background thread mixes the active voices and the music into fixed-size
+blocks and keeps one block queued behind the one playing, so latency stays
+around two blocks. The game thread only pushes (samples, volume) events.
+"""
+import os
+import hashlib
+import queue
+import threading
+import time
+import numpy as np
+import pygame
+import pygame.sndarray
+from config import *
+
+# bump when the synthesis code changes so stale cache files are ignored
+CACHE_VERSION = 1
+
+
+def mixer_format():
+    """(samplerate, channels) of the initialised mixer, or (44100, 1) if there is none."""
+    init = pygame.mixer.get_init()
+    if init:
+        return init[0], init[2]
+    return 44100, 1
+
+
+def envelope_curve(envelope, n, samplerate):
+    """Amplitude envelope of length n: 'flat' or 'adsr' (the note shape)."""
+    if envelope == 'flat':
+        return np.ones(n)
+    if envelope != 'adsr':
+        raise ValueError(f"unknown envelope: {envelope!r}")
+    attack = int(0.02 * samplerate)
+    decay = int(0.05 * samplerate)
+    release = int(0.12 * samplerate)
+    sustain_len = max(0, n - (attack + decay + release))
+    env = np.concatenate([
+        np.linspace(0.0, 1.0, attack, False),
+        np.linspace(1.0, 0.7, decay, False),
+        np.full(sustain_len, 0.7),
+        np.linspace(0.7, 0.0, release, False),
+    ])
+    if env.size < n:
+        # pad envelope if rounding made it shorter
+        env = np.pad(env, (0, n - env.size))
+    return env[:n]
+
+
+def synth_tone(freq, duration, volume=0.2, samplerate=44100, envelope='flat'):
+    """Mono int16 sine tone."""
+    n = int(samplerate * duration)
+    t = np.arange(n) / samplerate
+    wave_data = np.sin(2 * np.pi * freq * t) * envelope_curve(envelope, n, samplerate)
+    return np.trunc(wave_data * (volume * 32767)).astype(np.int16)
+
+
+def synth_partials(partials, duration, samplerate=44100):
+    """Mono int16 sum of (frequency, amplitude) sines, e.g. a loopable music bed."""
+    n = int(samplerate * duration)
+    t = np.arange(n) / samplerate
+    mix = np.zeros(n)
+    for freq, amp in partials:
+        mix += np.sin(2 * np.pi * t * freq) * amp
+    return (mix * 32767).astype(np.int16)
+
+
+def to_sound(samples, channels=None):
+    """Wrap mono int16 samples in a pygame Sound laid out for the mixer's channel count."""
+    if channels is None:
+        channels = mixer_format()[1]
+    arr = np.asarray(samples, dtype=np.int16).reshape(-1, 1)
+    if channels > 1:
+        arr = np.repeat(arr, channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(arr))
+
+
+class SampleCache:
+    """Rendered samples stored as .npy files and memory-mapped back on later runs."""
+    def __init__(self, directory=AUDIO_CACHE_DIR):
+        if directory and not os.path.isabs(directory):
+            directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+        self.directory = directory
+
+    def path(self, key):
+        digest = hashlib.sha1(repr((CACHE_VERSION,) + tuple(key)).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:20] + '.npy')
+
+    def get(self, key, build):
+        """Samples for `key`, loaded from disk or made by build() and saved."""
+        if not self.directory:
+            return build()
+        path = self.path(key)
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
+        samples = build()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, samples)
+            os.replace(tmp, path)
+        except OSError:
+            # read-only install: just keep the samples in memory
+            pass
+        return samples
+
+    def tone(self, freq, duration, volume=0.2, samplerate=44100, envelope='flat'):
+        key = ('tone', float(freq), float(duration), float(volume), int(samplerate), envelope)
+        return self.get(key, lambda: synth_tone(freq, duration, volume, samplerate, envelope))
+
+    def partials(self, partials, duration, samplerate=44100):
+        key = ('partials', tuple((float(f), float(a)) for f, a in partials), float(duration), int(samplerate))
+        return self.get(key, lambda: synth_partials(partials, duration, samplerate))
+
+
+class StreamedSound:
+    """Stands in for a pygame Sound: play() hands the samples to an AudioEngine."""
+    def __init__(self, engine, samples, volume=1.0):
+        self.engine = engine
+        self.samples = samples
+        self.volume = volume
+
+    def play(self):
+        self.engine.play(self.samples, self.volume)
+
+
+class AudioEngine:
+    """Mixes notes, effects and procedural music on a background thread into one Channel.
+
+    `music` is a list of (frequency Hz, amplitude) sines synthesized block by
+    block with a running phase, so it never loops audibly.
+    """
+    def __init__(self, samplerate=44100, channels=1, block=AUDIO_BLOCK, max_voices=AUDIO_MAX_VOICES,
+                 music=None, music_volume=1.0):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.block = block
+        self.max_voices = max_voices
+        self.events = queue.SimpleQueue()
+        # [samples, position, volume] of every sound still playing
+        self.voices = []
+        self.dropped_voices = 0
+        self.music = list(music or [])
+        self.music_volume = music_volume
+        self._phase = np.zeros(len(self.music))
+        self._step = np.array([2 * np.pi * f / samplerate for f, _ in self.music])
+        self._ramp = np.arange(1, block + 1)
+        self._acc = np.zeros(block)
+        self._out = np.zeros((block, channels), dtype=np.int16)
+        self.channel = None
+        self._thread = None
+        self._running = False
+
+    def sound(self, samples, volume=1.0):
+        return StreamedSound(self, samples, volume)
+
+    def play(self, samples, volume=1.0):
+        """Start `samples` (mono int16) at the next block; safe to call from any thread."""
+        self.events.put((samples, volume))
+
+    def mix(self):
+        """Mix the next block; returns it as (block, channels) int16 (reused buffer)."""
+        while True:
+            try:
+                samples, volume = self.events.get_nowait()
+            except queue.Empty:
+                break
+            self.voices.append([samples, 0, volume])
+        if len(self.voices) > self.max_voices:
+            # oldest voices are nearest their end anyway
+            self.dropped_voices += len(self.voices) - self.max_voices
+            del self.voices[:len(self.voices) - self.max_voices]
+
+        acc = self._acc
+        acc.fill(0.0)
+        if self.music:
+            for i, (_, amp) in enumerate(self.music):
+                acc += np.sin(self._phase[i] + self._step[i] * self._ramp) * (amp * 32767 * self.music_volume)
+            self._phase = (self._phase + self._step * self.block) % (2 * np.pi)
+        alive = []
+        for voice in self.voices:
+            samples, pos, volume = voice
+            chunk = samples[pos:pos + self.block]
+            if volume == 1.0:
+                acc[:len(chunk)] += chunk
+            else:
+                acc[:len(chunk)] += chunk * volume
+            voice[1] = pos + self.block
+            if voice[1] < len(samples):
+                alive.append(voice)
+        self.voices = alive
+        np.clip(acc, -32768, 32767, out=acc)
+        # broadcast the mono mix to every output channel
+        self._out[:] = acc[:, None]
+        return self._out
+
+    def start(self):
+        """Reserve a mixer channel and start streaming; returns False without a mixer."""
+        if not pygame.mixer.get_init():
+            return False
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='audio', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.channel is not None:
+            self.channel.stop()
+
+    def _run(self):
+        # poll a few times per block so the queue never runs dry
+        idle = self.block / self.samplerate / 4
+        channel = self.channel
+        while self._running:
+            if not channel.get_busy():
+                channel.play(pygame.mixer.Sound(buffer=self.mix()))
+            elif channel.get_queue() is None:
+                channel.queue(pygame.mixer.Sound(buffer=self.mix()))
+            else:
+                time.sleep(idle)
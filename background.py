@@ -0,0 +1,56 @@
+"""Pre-rendered checkerboard backgrounds.
+
+The playfield background only changes when a mushroom effect switches the
+theme, so each theme is drawn once into its own surface and the game blits
+that instead of redrawing every tile each frame.
+"""
+import pygame
+from config import *
+from grass import Collectible
+
+
+def theme_colors(theme):
+    """(tile color, alternate tile color) for a theme color, or the default grass."""
+    if theme:
+        return theme, tuple(min(255, int(c*0.9)) for c in theme)
+    return BG_COLOR, BG_COLOR_ALT
+
+
+def render_background(size, theme=None):
+    """Draw the checkerboard and ground strip for `theme` into a new surface of `size`."""
+    width, height = size
+    surf = pygame.Surface(size)
+    if pygame.display.get_surface() is not None:
+        # match the display format so the per-frame blit is a plain copy
+        surf = surf.convert()
+    bg1, bg2 = theme_colors(theme)
+    for y in range(0, height, TILE_SIZE):
+        for x in range(0, width, TILE_SIZE):
+            color = bg1 if ((x//TILE_SIZE + y//TILE_SIZE) % 2 == 0) else bg2
+            pygame.draw.rect(surf, color, (x, y, TILE_SIZE, TILE_SIZE))
+    # ground line
+    pygame.draw.rect(surf, (50,160,40), (0, height - TILE_SIZE, width, TILE_SIZE))
+    return surf
+
+
+class BackgroundCache:
+    """One cached background surface per theme, dropped when the target size changes."""
+    def __init__(self):
+        self.size = None
+        self._surfaces = {}
+
+    def get(self, size, theme=None):
+        if size != self.size:
+            self._surfaces.clear()
+            self.size = size
+        surf = self._surfaces.get(theme)
+        if surf is None:
+            surf = render_background(size, theme)
+            self._surfaces[theme] = surf
+        return surf
+
+    def prerender(self, size):
+        """Build the default background and every Collectible.BG_MAP theme up front."""
+        self.get(size)
+        for theme in Collectible.BG_MAP.values():
+            self.get(size, theme)
@@ -0,0 +1,216 @@
+"""Deterministic headless benchmarks.
+
+Runs the real Game (simulation + rendering) under SDL's dummy video and
+audio drivers with a seeded spawner and scripted input, over a few fixed
+scenarios, and reports frames/sec, per-phase frame time and peak Python
+memory. Results can be saved as a baseline and later runs compared to it.
+
+    python benchmark.py                          # run all scenarios
+    python benchmark.py --save-baseline          # store results as the baseline
+    python benchmark.py idle projectile_spam     # just these scenarios
+    python benchmark.py --sim-only --entities numpy
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import pygame
+from config import *
+from simulation import Simulation, TickInput
+from profiler import FrameProfiler
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+# slower than this fraction of the baseline counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+class Scenario:
+    """A named, seeded workload: how to prepare the world and what to press each tick."""
+    def __init__(self, name, description, frames=3000, setup=None, script=None):
+        self.name = name
+        self.description = description
+        self.frames = frames
+        self._setup = setup
+        self._script = script
+
+    def setup(self, sim):
+        # keep the run going through deaths so every frame does the same kind of work
+        sim.invulnerable = True
+        if self._setup:
+            self._setup(sim)
+
+    def input(self, tick):
+        if self._script:
+            return self._script(tick)
+        return TickInput()
+
+
+def _run_right_and_hop(tick):
+    return TickInput(right=(tick // 120) % 2 == 0, left=(tick // 120) % 2 == 1, jump=tick % 45 == 0)
+
+
+def _max_density(sim):
+    sp = sim.spawner
+    sp.grass_rate = 1.0
+    sp.obstacle_rate = 0.25
+    sp.wolf_rate = 0.25
+
+
+def _long_session(sim):
+    # speed after 30 minutes of continuous play at TICK_RATE
+    sim.game_speed = INITIAL_GAME_SPEED + SPEED_INCREMENT * TICK_RATE * 60 * 30
+
+
+SCENARIOS = [
+    Scenario('idle', "default spawn rates, sheep standing still"),
+    Scenario('run', "default spawn rates, running back and forth and jumping",
+             script=_run_right_and_hop),
+    Scenario('max_density', "a spawn roll succeeds almost every frame",
+             setup=_max_density, script=_run_right_and_hop),
+    Scenario('projectile_spam', "two shots every frame while running",
+             script=lambda tick: TickInput(right=tick % 200 < 100, left=tick % 200 >= 100, shots=2)),
+    Scenario('long_session', "game_speed grown for 30 minutes",
+             setup=_long_session, script=_run_right_and_hop),
+]
+
+
+def run_scenario(scenario, seed=0, entities=ENTITY_BACKEND, sim_only=False, frames=None, memory=True):
+    """Run one scenario and return its result dict."""
+    frames = frames or scenario.frames
+    result = {'frames': frames, 'seed': seed, 'entities': entities, 'sim_only': sim_only}
+
+    def make():
+        if sim_only:
+            target = Simulation(seed=seed, entities=entities)
+            target.profiler = FrameProfiler(capacity=frames)
+            scenario.setup(target)
+            return target, target
+        from game import Game
+        screen = pygame.display.get_surface()
+        game = Game(screen, seed=seed, sim_process=False)
+        if entities != ENTITY_BACKEND:
+            game.sim = Simulation(seed=seed, entities=entities)
+        game.state = 'game'
+        game.fps_limit = 0
+        game.profiler = game.sim.profiler = FrameProfiler(capacity=frames)
+        scenario.setup(game.sim)
+        return game, game.sim
+
+    def loop(target, sim):
+        prof = sim.profiler
+        for tick in range(frames):
+            inp = scenario.input(tick)
+            if sim_only:
+                prof.begin_frame()
+                target.step(inp)
+                prof.end_frame()
+            else:
+                target.run_frame(inp)
+
+    # timing pass
+    target, sim = make()
+    start = time.perf_counter()
+    loop(target, sim)
+    elapsed = time.perf_counter() - start
+    if not sim_only:
+        target.close()
+    result['fps'] = frames / elapsed
+    result['score'] = sim.score
+    result['game_speed'] = sim.game_speed
+    result['phases'] = {name: {k: round(v, 4) for k, v in st.items()}
+                        for name, st in sim.profiler.stats().items()}
+
+    # memory pass (tracemalloc slows everything down, so it is not timed)
+    if memory:
+        tracemalloc.start()
+        target, sim = make()
+        loop(target, sim)
+        if not sim_only:
+            target.close()
+        result['peak_kib'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Print each scenario against the baseline; returns the names that regressed."""
+    regressed = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"  {name:<16} no baseline")
+            continue
+        change = res['fps'] / base['fps'] - 1.0
+        flag = ''
+        if change < -tolerance:
+            flag = '  << REGRESSION'
+            regressed.append(name)
+        print(f"  {name:<16} {base['fps']:9.1f} -> {res['fps']:9.1f} fps ({change:+.1%}){flag}")
+        for phase, st in res['phases'].items():
+            old = base.get('phases', {}).get(phase)
+            if old and old['mean'] > 0:
+                print(f"      {phase:<22} {old['mean']:8.4f} -> {st['mean']:8.4f} ms "
+                      f"({st['mean'] / old['mean'] - 1.0:+.1%})")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help="scenario names (default: all)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frames', type=int, default=None, help="override frames per scenario")
+    parser.add_argument('--entities', default=ENTITY_BACKEND, choices=['sprites', 'numpy'])
+    parser.add_argument('--sim-only', action='store_true', help="step the Simulation without rendering")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    by_name = {s.name: s for s in SCENARIOS}
+    names = args.scenarios or list(by_name)
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(by_name)}")
+
+    pygame.init()
+    if not args.sim_only:
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = {}
+    for name in names:
+        scenario = by_name[name]
+        res = run_scenario(scenario, seed=args.seed, entities=args.entities, sim_only=args.sim_only,
+                           frames=args.frames, memory=not args.no_memory)
+        results[name] = res
+        mem = f"  peak {res['peak_kib']:8.0f} KiB" if 'peak_kib' in res else ''
+        print(f"{name:<16} {res['fps']:9.1f} fps  frame p50 {res['phases']['frame']['p50']:.3f} ms"
+              f"  p99 {res['phases']['frame']['p99']:.3f} ms{mem}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"compared to {args.baseline}:")
+        if compare(results, baseline, args.tolerance):
+            status = 1
+    pygame.quit()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Off-thread frame capture for attract-mode and tournament footage.
+
+FrameRecorder copies each presented frame's raw pixels into a preallocated
+ring of slots (a single memcpy on the game thread) and a writer thread
+converts them to RGB and writes them out: piped into ffmpeg when it is on
+PATH, otherwise dumped as a raw RGB24 file next to a JSON description.
+When the writer falls behind and every slot is taken, new frames are
+dropped (and counted) instead of making the game wait.
+"""
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import numpy as np
+import pygame
+from config import *
+
+
+class FrameRecorder:
+    """Records frames of surfaces shaped like `surface` to `base` + '.mp4' (or '.rgb')."""
+    def __init__(self, surface, base, fps=TICK_RATE, ring=CAPTURE_RING, encoder='auto'):
+        self.width, self.height = surface.get_size()
+        self.fps = fps
+        self.base = base
+        # 32-bit surfaces are copied raw and converted on the writer thread
+        self.raw = surface.get_bytesize() == 4
+        if self.raw:
+            self.pitch = surface.get_pitch()
+            self.shifts = surface.get_shifts()[:3]
+            slot_size = self.height * self.pitch
+        else:
+            slot_size = self.height * self.width * 3
+        self.slots = np.empty((ring, slot_size), dtype=np.uint8)
+        self._rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._free = queue.SimpleQueue()
+        for i in range(ring):
+            self._free.put(i)
+        self._filled = queue.SimpleQueue()
+        self.frames = 0
+        self.dropped = 0
+        self.started = time.time()
+
+        ffmpeg = shutil.which('ffmpeg') if encoder == 'auto' else encoder
+        self.path = base + ('.mp4' if ffmpeg else '.rgb')
+        if ffmpeg:
+            self._proc = subprocess.Popen(
+                [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{self.width}x{self.height}', '-r', str(fps), '-i', '-',
+                 '-pix_fmt', 'yuv420p', self.path],
+                stdin=subprocess.PIPE)
+            self._out = self._proc.stdin
+        else:
+            self._proc = None
+            self._out = open(self.path, 'wb')
+        self._thread = threading.Thread(target=self._write, name='capture', daemon=True)
+        self._thread.start()
+
+    def capture(self, surface):
+        """Queue a copy of `surface`; returns False if the frame was dropped."""
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if self.raw:
+            self.slots[slot] = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        else:
+            self.slots[slot] = np.frombuffer(pygame.image.tobytes(surface, 'RGB'), dtype=np.uint8)
+        self._filled.put(slot)
+        return True
+
+    def _rgb_bytes(self, slot):
+        if not self.raw:
+            return self.slots[slot].data
+        px = self.slots[slot].view(np.uint32).reshape(self.height, -1)[:, :self.width]
+        rgb = self._rgb
+        for c, shift in enumerate(self.shifts):
+            # assignment keeps the low byte
+            rgb[..., c] = px >> shift
+        return rgb.data
+
+    def _write(self):
+        while True:
+            slot = self._filled.get()
+            if slot is None:
+                break
+            try:
+                self._out.write(self._rgb_bytes(slot))
+                self.frames += 1
+            except (OSError, ValueError):
+                # encoder went away; keep draining so capture() never blocks
+                self.dropped += 1
+            self._free.put(slot)
+
+    def close(self):
+        """Finish writing queued frames; returns the path of the recording."""
+        self._filled.put(None)
+        self._thread.join()
+        try:
+            self._out.close()
+        except OSError:
+            pass
+        if self._proc is not None:
+            self._proc.wait()
+        info = {
+            'path': self.path, 'width': self.width, 'height': self.height, 'fps': self.fps,
+            'pix_fmt': 'rgb24', 'frames': self.frames, 'dropped': self.dropped,
+            'started': self.started,
+        }
+        with open(self.base + '.json', 'w') as f:
+            json.dump(info, f, indent=1)
+        return self.path
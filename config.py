@@ -3,6 +3,28 @@ SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
 
+# Window: the game is always drawn at SCREEN_WIDTH x SCREEN_HEIGHT and scaled up once per
+# frame to fill the window (WINDOW_SCALE times the game size, or the desktop when FULLSCREEN)
+WINDOW_SCALE = 1
+FULLSCREEN = False
+# scale by whole numbers only (crisp pixels, black bars); False stretches to fill, keeping the aspect
+INTEGER_SCALING = True
+
+# Game loop: the simulation always runs at TICK_RATE ticks per second (speeds and spawn
+# rates below are per tick), frames are drawn up to RENDER_FPS (0 = uncapped) with
+# positions interpolated between the last two ticks
+TICK_RATE = FPS
+RENDER_FPS = FPS
+INTERPOLATE = True
+# at most this many ticks per frame when the machine falls behind; past that the game slows down
+MAX_CATCHUP_TICKS = 5
+# menu, rules and game-over screens sleep in the event queue until input arrives,
+# waking at least this often (ms)
+IDLE_WAIT_MS = 1000
+
+# rendered text surfaces kept by the HUD's TextCache (all fonts together)
+TEXT_CACHE_SIZE = 128
+
 SHEEP_SPEED = 4
 
 SHEEP_JUMP_SPEED = -12
@@ -16,9 +38,76 @@ SPEED_INCREMENT = 0.001  # per frame
 
 GRASS_SPAWN_RATE = 0.02  # probability per frame
 OBSTACLE_SPAWN_RATE = 0.01
+WOLF_SPAWN_RATE = 0.003
+# Spawning: 'schedule' draws a seeded timeline of upcoming spawns in batches (schedule.py),
+# 'rolls' rolls every spawn chance every frame
+SPAWN_MODE = 'schedule'
+SPAWN_LOOKAHEAD = 120  # frames of upcoming spawns always known ahead
 
 SCORE_PER_GRASS = 10
 
+# Entity backend for collectibles/obstacles/wolves/projectiles:
+# 'sprites' (one pygame Sprite each) or 'numpy' (struct-of-arrays, see entities.py)
+ENTITY_BACKEND = 'sprites'
+
+# Collision broad phase: once wolves x projectiles reaches this many pairs, projectiles
+# are sorted along x (sweep and prune) so each wolf only tests nearby ones
+BROAD_PHASE_MIN_PAIRS = 2048
+
+# Rendering: push only changed screen regions (display.update(rects)) instead of a full flip
+DIRTY_RECTS = False
+
+# Run the simulation in a separate process that publishes world snapshots through shared
+# memory, so simulating the next ticks overlaps drawing this frame (simproc.py)
+SIM_PROCESS = False
+
+# Startup: print how long each import and init step took once everything has loaded
+# (also `python main.py --startup-report`), flagging a first frame slower than the budget
+STARTUP_REPORT = False
+STARTUP_BUDGET_MS = 500
+
+# Profiling: time every frame phase from startup (F3 toggles the overlay and
+# starts profiling if this is off, F4 exports the buffer to PROFILE_DIR)
+PROFILER = False
+PROFILER_FRAMES = 600  # ring buffer length
+PROFILE_DIR = 'profiles'
+
+# Replays: record every session's seed and inputs, saved to RECORDING_DIR on quit
+# (replay.py plays them back headless or in the window)
+RECORD_SESSIONS = False
+RECORDING_DIR = 'recordings'
+# shots fired in one tick; recordings store the count in 4 bits, extra clicks wait for the next tick
+MAX_SHOTS = 15
+# race against this many ghost sheep replaying earlier recordings on the same seed (see herd.py)
+GHOSTS = 0
+
+# local players sharing the keyboard (up to 3): WASD + Space, arrows + Right Ctrl, IJL + K
+LOCAL_PLAYERS = 1
+
+# Video capture (F5 starts/stops): frames go through a ring of this many slots to a
+# writer thread (ffmpeg if installed, raw RGB otherwise); a full ring drops frames
+CAPTURE_DIR = 'captures'
+CAPTURE_RING = 16
+
+# Telemetry: pickups, wolf kills, deaths, effects and game_speed samples as binary
+# records, written by a background thread to rotating files in TELEMETRY_DIR
+TELEMETRY = False
+TELEMETRY_DIR = 'telemetry'
+TELEMETRY_FLUSH_SECONDS = 2.0
+TELEMETRY_FILE_BYTES = 4 * 1024 * 1024  # start a new file past this size
+TELEMETRY_FILES = 20  # oldest files beyond this many are deleted
+TELEMETRY_SPEED_EVERY = TICK_RATE  # ticks between game_speed samples
+
+# Audio: rendered samples are cached here (relative paths are inside the game folder); None disables
+AUDIO_CACHE_DIR = '.cache/audio'
+# background loop: (frequency Hz, amplitude) sines
+MUSIC_PARTIALS = [(220, 0.2), (440, 0.1), (660, 0.05)]
+# mix all sounds and the music on a background thread into one streamed channel
+# (False: one pygame Sound per effect on mixer channels, music as a looped Sound)
+AUDIO_STREAM = True
+AUDIO_BLOCK = 512  # sample frames per mixed block; latency is about two blocks
+AUDIO_MAX_VOICES = 32
+
 # Colors (R,G,B)
 BG_COLOR = (120, 200, 80)  # base grass
 BG_COLOR_ALT = (100, 180, 60)
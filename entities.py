@@ -0,0 +1,191 @@
+"""Struct-of-arrays entity backend.
+
+Keeps collectibles, obstacles, wolves and projectiles in flat NumPy arrays
+instead of one Sprite per entity, so moving and culling them is a couple of
+vectorized operations however many are on screen. The movement and
+off-screen rules mirror the update() methods in grass.py exactly.
+"""
+import numpy as np
+from config import *
+from grass import Collectible, Obstacle, Wolf, Projectile, Spawner
+
+# entity categories
+COLLECTIBLE = 0
+OBSTACLE = 1
+WOLF = 2
+PROJECTILE = 3
+
+# collectible kinds by index (same order as Collectible.COLOR_MAP)
+KINDS = list(Collectible.COLOR_MAP)
+KIND_INDEX = {k: i for i, k in enumerate(KINDS)}
+
+# per-category horizontal speed factor; dx per tick is int(factor * game_speed)
+CATEGORY_VX = {
+    COLLECTIBLE: -2.0,
+    OBSTACLE: -2.0,
+    WOLF: -4.0,
+    PROJECTILE: 10.0,
+}
+
+
+class EntityStore:
+    """All non-player entities of one game, one row per entity, in spawn order."""
+    FIELDS = (
+        ('x', np.int64), ('y', np.int64), ('w', np.int64), ('h', np.int64),
+        ('vx', np.float64), ('cat', np.int8), ('kind', np.int8),
+        ('value', np.int32), ('alive', np.bool_),
+    )
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.capacity = capacity
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            old = getattr(self, name)
+            arr = np.zeros(self.capacity, dtype=dtype)
+            arr[:self.n] = old[:self.n]
+            setattr(self, name, arr)
+
+    def add(self, cat, x, y, w, h, kind=0, value=0):
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.x[i] = x
+        self.y[i] = y
+        self.w[i] = w
+        self.h[i] = h
+        self.vx[i] = CATEGORY_VX[cat]
+        self.cat[i] = cat
+        self.kind[i] = kind
+        self.value[i] = value
+        self.alive[i] = True
+        self.n += 1
+        return i
+
+    def add_projectile(self, cx, cy):
+        # same geometry as Projectile: 12x6 rect centred on (cx, cy)
+        return self.add(PROJECTILE, cx - 6, cy - 3, 12, 6)
+
+    def step(self, game_speed):
+        """Move every entity one tick and mark the ones that left the screen as dead."""
+        n = self.n
+        if n == 0:
+            return
+        vx = self.vx[:n]
+        x = self.x[:n]
+        # np.trunc matches int() rounding toward zero for both directions
+        x += np.trunc(vx * game_speed).astype(np.int64)
+        gone = np.where(vx > 0, x > SCREEN_WIDTH, x + self.w[:n] < 0)
+        self.alive[:n] &= ~gone
+
+    def compact(self):
+        """Drop dead rows in one pass, keeping spawn order."""
+        n = self.n
+        keep = np.flatnonzero(self.alive[:n])
+        m = keep.size
+        if m == n:
+            return
+        for name, _ in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:m] = arr[:n][keep]
+        self.n = m
+
+    def clear(self, *cats):
+        """Kill every entity in the given categories (all of them if none given)."""
+        n = self.n
+        if cats:
+            self.alive[:n] &= ~np.isin(self.cat[:n], cats)
+        else:
+            self.alive[:n] = False
+        self.compact()
+
+    def count(self, cat):
+        n = self.n
+        return int(np.count_nonzero(self.alive[:n] & (self.cat[:n] == cat)))
+
+    def overlapping(self, rect, cat):
+        """Indices (in spawn order) of live entities of `cat` that collide with `rect`."""
+        n = self.n
+        x = self.x[:n]
+        y = self.y[:n]
+        # same test as pygame.Rect.colliderect
+        mask = (self.alive[:n] & (self.cat[:n] == cat)
+                & (x < rect.right) & (rect.left < x + self.w[:n])
+                & (y < rect.bottom) & (rect.top < y + self.h[:n]))
+        return np.flatnonzero(mask)
+
+    def collide_wolves_projectiles(self):
+        """Kill wolves and the projectiles touching them; returns the number of wolves killed.
+
+        Resolves pairs wolf by wolf in spawn order, like
+        pygame.sprite.groupcollide(wolves, projectiles, True, True).
+        """
+        n = self.n
+        alive = self.alive[:n]
+        wolves = np.flatnonzero(alive & (self.cat[:n] == WOLF))
+        shots = np.flatnonzero(alive & (self.cat[:n] == PROJECTILE))
+        if wolves.size == 0 or shots.size == 0:
+            return 0
+        x, y, w, h = self.x, self.y, self.w, self.h
+        hit = ((x[wolves, None] < x[None, shots] + w[None, shots])
+               & (x[None, shots] < x[wolves, None] + w[wolves, None])
+               & (y[wolves, None] < y[None, shots] + h[None, shots])
+               & (y[None, shots] < y[wolves, None] + h[wolves, None]))
+        killed = 0
+        for wi in np.flatnonzero(hit.any(axis=1)):
+            row = hit[wi] & alive[shots]
+            if row.any():
+                alive[shots[row]] = False
+                alive[wolves[wi]] = False
+                killed += 1
+        return killed
+
+    def _image(self, cat, kind):
+        # shared per-kind images from the sprite classes
+        if cat == COLLECTIBLE:
+            return Collectible.image_for(KINDS[kind])
+        if cat == OBSTACLE:
+            return Obstacle.image_for()
+        if cat == WOLF:
+            return Wolf.image_for()
+        return Projectile.image_for()
+
+    def draw(self, surface, shift=None):
+        """Blit every live entity, collectibles first like Game's group order; returns the rects.
+
+        `shift` optionally offsets x per category (indexed by COLLECTIBLE..PROJECTILE).
+        """
+        n = self.n
+        live = np.flatnonzero(self.alive[:n])
+        order = live[np.argsort(self.cat[live], kind='stable')]
+        x = self.x[:n]
+        if shift is not None:
+            x = x + np.asarray(shift, dtype=np.int64)[self.cat[:n]]
+        image = self._image
+        return surface.blits([
+            (image(int(self.cat[i]), int(self.kind[i])), (int(x[i]), int(self.y[i])))
+            for i in order
+        ])
+
+
+class ArraySpawner(Spawner):
+    """Spawner that puts new entities into an EntityStore instead of sprite groups."""
+    def __init__(self, store, rng=None, schedule=False):
+        super().__init__(None, None, None, rng=rng, schedule=schedule)
+        self.store = store
+
+    def spawn_collectible(self, x, y, kind):
+        self.store.add(COLLECTIBLE, x, y, GRASS_SIZE, GRASS_SIZE, KIND_INDEX[kind], SCORE_PER_GRASS)
+
+    def spawn_obstacle(self, x, y):
+        self.store.add(OBSTACLE, x, y, OBSTACLE_SIZE, OBSTACLE_SIZE)
+
+    def spawn_wolf(self, x, y):
+        self.store.add(WOLF, x, y, OBSTACLE_SIZE, OBSTACLE_SIZE)
@@ -1,72 +1,195 @@
+import os
+import threading
+import time
 import pygame
 from config import *
-from sheep import Sheep
-from grass import Collectible, Obstacle, Spawner, Wolf, Projectile
-import random
-import math
-import io
-import wave
-import struct
-import numpy as np
-import pygame.sndarray
+from simulation import Simulation, TickInput
+from background import BackgroundCache
+from profiler import FrameProfiler, NULL_PROFILER
+from text import TextCache
+from entities import CATEGORY_VX, COLLECTIBLE, OBSTACLE, WOLF, PROJECTILE
+import startup
 
 class Game:
-    def __init__(self, screen):
+    def __init__(self, screen, seed=None, sim_process=SIM_PROCESS, record=RECORD_SESSIONS,
+                 telemetry=TELEMETRY, ghosts=GHOSTS):
+        # record/telemetry/ghosts default to config.py; replay.watch() turns them off
         self.state = 'menu'  # menu, rules, game
-        self.screen = screen
+        # everything is drawn into self.screen at the game's own resolution; present()
+        # scales it to the window in one pass when the two differ
+        self.window = screen
+        game_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        if screen.get_size() == game_size:
+            self.screen = screen
+        else:
+            self.screen = pygame.Surface(game_size, 0, screen)
+        self.view = self._fit_view()
+        win = self.window.get_rect()
+        view = self.view
+        # letterbox bars around the view
+        self._bars = [r for r in (
+            pygame.Rect(0, 0, win.width, view.top),
+            pygame.Rect(0, view.bottom, win.width, win.height - view.bottom),
+            pygame.Rect(0, view.top, view.left, view.height),
+            pygame.Rect(view.right, view.top, win.width - view.right, view.height),
+        ) if r.width > 0 and r.height > 0]
         self.clock = pygame.time.Clock()
+        # frame cap for clock.tick; 0 runs unthrottled (benchmarks)
+        self.fps_limit = RENDER_FPS
         self.running = True
-        self.game_over = False
-        self.game_speed = INITIAL_GAME_SPEED
 
-        # groups
-        self.sheep_group = pygame.sprite.Group()
-        self.collectible_group = pygame.sprite.Group()
-        self.obstacle_group = pygame.sprite.Group()
-        self.wolf_group = pygame.sprite.Group()
-        self.projectile_group = pygame.sprite.Group()
+        # fixed timestep: real time accumulates and is spent in whole simulation ticks
+        self.tick_time = 1.0 / TICK_RATE
+        self.max_catchup = MAX_CATCHUP_TICKS
+        self.interpolate = INTERPOLATE
+        self._accumulator = 0.0
+        self._frame_start = time.perf_counter()
+        # ticks skipped because a frame was over the catch-up budget
+        self.dropped_ticks = 0
+        # sheep position before the last tick, for interpolation
+        self._prev_player = None
+
+        # optional features import their modules only when switched on
+        ghost_count, ghosts = ghosts, []
+        if ghost_count:
+            import replay
+            # ghosts race on the track (seed) of the recordings they replay
+            ghosts = replay.ghosts(count=ghost_count)
+        spawns = SPAWN_MODE
+        if ghosts and seed is None:
+            seed, spawns = ghosts[0].seed, ghosts[0].spawns
+        # local players after the first, with their (left, right, jump) keys and shoot key
+        self.player_keys = list(zip(('arrows', 'ijl'), (pygame.K_RCTRL, pygame.K_k)))[:LOCAL_PLAYERS - 1]
+        # seed + inputs of this session for replay.py (recordings hold one player's input)
+        record = record and not self.player_keys
+        self.sim_process = None
+        with startup.step('simulation'):
+            if sim_process:
+                from simproc import SimProcess
+                # the simulation runs in a worker process (which also records and logs
+                # telemetry); self.sim is a view of its latest snapshot
+                self.sim_process = SimProcess(seed, ENTITY_BACKEND, spawns, [rec.controls() for rec in ghosts],
+                                              len(self.player_keys), record=record, telemetry=telemetry)
+                self.sim = self.sim_process.view
+            else:
+                # world state lives in the headless simulation; Game adds window, input and audio
+                self.sim = Simulation(seed=seed, entities=ENTITY_BACKEND, spawns=spawns)
+                for rec in ghosts:
+                    self.sim.add_ghost(*rec.controls())
+                for _ in self.player_keys:
+                    self.sim.add_player()
+        # input gathered by process_events for the next tick
+        self._shots = 0
+        self._player_shots = [0] * len(self.player_keys)
+        self._restart = False
+        self.recording = None
+        if record and self.sim_process is None:
+            from replay import Recording
+            self.recording = Recording(self.sim.seed, ENTITY_BACKEND, self.sim.spawns)
+        # gameplay analytics, written off-thread
+        self.telemetry = None
+        if telemetry and self.sim_process is None:
+            from telemetry import Telemetry
+            self.telemetry = Telemetry()
+
+        # dirty-rect rendering: push only the regions that changed instead of flipping
+        self.dirty_rects = DIRTY_RECTS
+        # what is currently on the display; None forces the next frame to be a full one
+        self._shown_state = None
+        self._shown_bg = None
+        self._entity_rects = []
+        self._herd_rects = []
+        self._hud_rects = []
+        # menu and rules pages composed once per screen size
+        self._static_screens = {}
 
-        # create player
-        start_x = 100
-        start_y = SCREEN_HEIGHT - TILE_SIZE - SHEEP_SIZE
-        self.player = Sheep(start_x, start_y)
-        self.sheep_group.add(self.player)
+        # per-phase frame timings (F3 overlay, F4 export)
+        self.profiler = FrameProfiler() if PROFILER else NULL_PROFILER
+        self.sim.profiler = self.profiler
+        self.show_profile = False
+        # set to a pixels.PixelObserver to capture every rendered game frame
+        self.pixel_observer = None
+        # F5 video capture (capture.FrameRecorder)
+        self.frame_recorder = None
 
-        self.spawner = Spawner(self.collectible_group, self.obstacle_group, self.wolf_group)
+        self.backgrounds = BackgroundCache()
 
         # fonts (try to use a pixel-like font if present, otherwise fallback)
-        try:
-            # try local assets font first
-            self.font = pygame.font.Font('assets/fonts/pixel_font.ttf', 20)
-        except Exception:
+        with startup.step('fonts'):
             try:
-                self.font = pygame.font.SysFont('Consolas', 20)
+                # try local assets font first
+                self.font = pygame.font.Font('assets/fonts/pixel_font.ttf', 20)
             except Exception:
-                self.font = pygame.font.Font(None, 20)
+                try:
+                    self.font = pygame.font.SysFont('Consolas', 20)
+                except Exception:
+                    self.font = pygame.font.Font(None, 20)
+            # profiler overlay
+            self.small_font = pygame.font.Font(None, 18)
+        # HUD strings and score digits are rasterized once
+        self.text = TextCache()
 
-        # simple procedural sounds (generate short sine blips)
-        try:
-            pygame.mixer.init()
-        except Exception:
-            # mixer may fail in headless/test environments
-            pass
+        # the menu needs none of the sounds or game backgrounds: a loader thread makes
+        # them after the first frame is up, and the game screen waits for it (wait_ready)
+        self.samples = None
+        self.audio = None
+        self.sound_eat = self.sound_mushroom = self.sound_shoot = None
+        self.sound_jump = self.sound_wolf = self.sound_over = None
+        self.note_sounds = {}
+        self._loader = threading.Thread(target=self._run_loader, name='loader', daemon=True)
+        # set once the loader is done
+        self.ready = threading.Event()
+
+    def _run_loader(self):
         try:
-            # allow many overlapping notes
-            pygame.mixer.set_num_channels(32)
-        except Exception:
-            pass
-        # eat / grass sound
-        self.sound_eat = self._make_sound(660, 0.08)
-        # mushroom pickup
-        self.sound_mushroom = self._make_sound(330, 0.12)
-        # shooting
-        self.sound_shoot = self._make_sound(1200, 0.05)
-        # jump
-        self.sound_jump = self._make_sound(900, 0.05)
-        # wolf hit / enemy defeated
-        self.sound_wolf = self._make_sound(200, 0.08)
-        # game over
-        self.sound_over = self._make_sound(150, 0.4)
+            self._load_assets()
+        finally:
+            startup.mark('ready')
+            self.ready.set()
+
+    def _load_assets(self):
+        """Prerender the game backgrounds, open the mixer and synthesize every sound (loader thread)."""
+        import audio
+        with startup.step('backgrounds'):
+            self.backgrounds.prerender(self.screen.get_size())
+
+        # simple procedural sounds (generate short sine blips)
+        with startup.step('mixer'):
+            try:
+                pygame.mixer.init()
+            except Exception:
+                # mixer may fail in headless/test environments
+                pass
+            try:
+                # allow many overlapping notes
+                pygame.mixer.set_num_channels(32)
+            except Exception:
+                pass
+        with startup.step('audio engine'):
+            # synthesized samples are cached on disk between launches
+            self.samples = audio.SampleCache()
+            # streaming mixer; sounds made below play through it when it is running
+            if AUDIO_STREAM:
+                samplerate, channels = audio.mixer_format()
+                engine = audio.AudioEngine(samplerate, channels, music=MUSIC_PARTIALS)
+                try:
+                    if engine.start():
+                        self.audio = engine
+                except Exception:
+                    pass
+        with startup.step('sound effects'):
+            # eat / grass sound
+            self.sound_eat = self._make_sound(660, 0.08)
+            # mushroom pickup
+            self.sound_mushroom = self._make_sound(330, 0.12)
+            # shooting
+            self.sound_shoot = self._make_sound(1200, 0.05)
+            # jump
+            self.sound_jump = self._make_sound(900, 0.05)
+            # wolf hit / enemy defeated
+            self.sound_wolf = self._make_sound(200, 0.08)
+            # game over
+            self.sound_over = self._make_sound(150, 0.4)
 
         # Musical scale mapping (C major by default)
         NOTE_FREQS = {
@@ -91,40 +214,50 @@ class Game:
         }
 
         # pre-generate sounds for each note so collecting feels instantaneous
-        self.note_sounds = {}
-        for k, note in self.kind_to_note.items():
-            freq = NOTE_FREQS.get(note, 440.0)
-            # generate a longer, musically-shaped note (ADSR envelope)
-            self.note_sounds[k] = self._make_note_sound(freq, duration=0.35, volume=0.35)
+        with startup.step('note bank'):
+            for k, note in self.kind_to_note.items():
+                freq = NOTE_FREQS.get(note, 440.0)
+                # generate a longer, musically-shaped note (ADSR envelope)
+                self.note_sounds[k] = self._make_note_sound(freq, duration=0.35, volume=0.35)
 
-        # background music (simple loop) - use already-imported numpy and pygame.sndarray
-        try:
-            samplerate = 22050
-            duration = 2.0
-            t = np.linspace(0, duration, int(samplerate * duration), False)
-            melody = np.sin(2 * np.pi * t * 220) * 0.2
-            melody += np.sin(2 * np.pi * t * 440) * 0.1
-            melody += np.sin(2 * np.pi * t * 660) * 0.05
-            arr = np.array(melody * 32767, dtype=np.int16)
-            arr = arr.reshape(-1, 1)
-            sound = pygame.sndarray.make_sound(arr)
-            sound.play(-1)
-        except Exception:
-            pass
+        # background music: a simple loop, unless the streaming engine synthesizes it
+        with startup.step('music'):
+            if self.audio is None:
+                try:
+                    samplerate, channels = audio.mixer_format()
+                    melody = self.samples.partials(MUSIC_PARTIALS, 2.0, samplerate)
+                    audio.to_sound(melody, channels).play(-1)
+                except Exception:
+                    pass
+
+    def start_loading(self):
+        """Start the loader thread if it hasn't been (run_frame does once the first frame is shown)."""
+        if self._loader is not None and self._loader.ident is None:
+            self._loader.start()
 
-        self.score = 0
-        # effect timers
-        self.effect = None
-        self.effect_timer = 0
-        self.effect_bg = None
+    def wait_ready(self):
+        """Block until sounds and backgrounds are loaded (starting the load if needed)."""
+        if self._loader is not None:
+            self.start_loading()
+            self._loader.join()
+            self._loader = None
 
-    def process_events(self):
-        for event in pygame.event.get():
+    def process_events(self, events=None):
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 self.running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.toggle_profiler()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.export_profile()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                self.toggle_capture()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # the window contents were lost, repaint everything next frame
+                self._shown_state = None
             if self.state == 'menu':
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mx, my = event.pos
+                    mx, my = self.to_game(event.pos)
                     # Start button
                     if 300 < mx < 500 and 250 < my < 310:
                         self.state = 'game'
@@ -135,175 +268,419 @@ class Game:
                 if event.type == pygame.KEYDOWN or (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
                     self.state = 'menu'
             elif self.state == 'game':
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_r and self.game_over:
-                    self.reset()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r and self.sim.game_over:
+                    self._restart = True
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    px = self.player.rect.right
-                    py = self.player.rect.centery
-                    self.projectile_group.add(Projectile(px, py))
+                    self._shots += 1
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    px = self.player.rect.right
-                    py = self.player.rect.centery
-                    self.projectile_group.add(Projectile(px, py))
+                    self._shots += 1
+                if event.type == pygame.KEYDOWN:
+                    for i, (_, shoot_key) in enumerate(self.player_keys):
+                        if event.key == shoot_key:
+                            self._player_shots[i] += 1
 
     def reset(self):
-        self.game_over = False
-        self.score = 0
-        self.game_speed = INITIAL_GAME_SPEED
-        self.collectible_group.empty()
-        self.obstacle_group.empty()
-        self.player.rect.topleft = (100, SCREEN_HEIGHT - TILE_SIZE - SHEEP_SIZE)
-        self.player.vx = 0
-        self.player.vy = 0
-        self.player.size_mod = 1.0
-        self.effect = None
-        self.effect_timer = 0
-
-    def update(self):
+        self.sim.reset()
+
+    def advance(self, elapsed, inp=None):
+        """Run the ticks that `elapsed` seconds of real time add up to; returns the interpolation fraction.
+
+        With `inp` (benchmarks, replays) exactly one tick runs with that input instead.
+        """
+        if inp is not None:
+            self._prev_player = None
+            self.update(inp)
+            return 1.0
+        if self.sim_process is not None:
+            return self._sync_process()
+        dt = self.tick_time
+        acc = self._accumulator + elapsed
+        ticks = int(acc // dt)
+        if ticks > self.max_catchup:
+            # too far behind to catch up: drop the backlog rather than spiral
+            self.dropped_ticks += ticks - self.max_catchup
+            ticks = self.max_catchup
+            acc = ticks * dt + acc % dt
+        self._accumulator = acc - ticks * dt
+        sim = self.sim
+        for _ in range(ticks):
+            was_over = sim.game_over
+            self._prev_player = sim.player.rect.topleft
+            self.update()
+            if was_over and not sim.game_over:
+                # restarted: don't slide the sheep over from where it died
+                self._prev_player = sim.player.rect.topleft
+        if not self.interpolate:
+            return 1.0
+        return min(self._accumulator / dt, 1.0)
+
+    def _sync_process(self):
+        """Send this frame's input to the simulation process and pick up its latest snapshot."""
+        proc = self.sim_process
+        proc.send(*self._take_input())
+        for event in proc.sync():
+            self._play_event(event)
+        # the snapshot knows where the sheep was a tick earlier
+        self._prev_player = self.sim.prev_player
+        if not self.interpolate:
+            return 1.0
+        return proc.alpha()
+
+    def _take_input(self):
+        """TickInputs for every local player from the keyboard and the queued clicks and presses."""
         keys = pygame.key.get_pressed()
-        if not self.game_over:
-            # effect timer
-            if self.effect_timer > 0:
-                self.effect_timer -= 1
-                if self.effect_timer == 0:
-                    self._clear_effect()
-
-            self.player.update(keys, self.game_speed)
-            # play jump sound if the sheep initiated a jump this frame
-            try:
-                if getattr(self.player, 'last_jumped', False):
-                    self.sound_jump.play()
-            except Exception:
-                pass
-            # spawn
-            self.spawner.maybe_spawn(self.game_speed)
-            # update groups
-            self.collectible_group.update(self.game_speed)
-            self.obstacle_group.update(self.game_speed)
-            self.wolf_group.update(self.game_speed)
-            self.projectile_group.update(self.game_speed)
-
-            # collisions with collectibles
-            hits = pygame.sprite.spritecollide(self.player, self.collectible_group, dokill=True)
-            for c in hits:
-                # double score for pink/blue mushrooms
-                if c.kind in ('mushroom_pink', 'mushroom_blue'):
-                    self.score += c.value * 2
-                else:
-                    self.score += c.value
-                # play musical note mapped to this collectible kind
-                try:
-                    snd = self.note_sounds.get(c.kind, None)
-                    if snd:
-                        snd.play()
-                    else:
-                        # fallback eat sound
-                        self.sound_eat.play()
-                except Exception:
-                    pass
-                # handle colored mushroom effects
-                if c.kind.startswith('mushroom'):
-                    self.effect = c.kind
-                    self.effect_timer = FPS * 3
-                    self.effect_bg = Collectible.BG_MAP.get(c.kind, None)
-            # projectile-wolf collision
-            for wolf in pygame.sprite.groupcollide(self.wolf_group, self.projectile_group, True, True):
-                try:
-                    self.sound_wolf.play()
-                except Exception:
-                    pass
-                # reward points for defeating a wolf
-                self.score += 5
-            # collisions with obstacles
-            if pygame.sprite.spritecollideany(self.player, self.obstacle_group):
-                self.game_over = True
-                try:
-                    self.sound_over.play()
-                except Exception:
-                    pass
-            # wolf-player collision (game over)
-            if pygame.sprite.spritecollideany(self.player, self.wolf_group):
-                self.game_over = True
+        # with several players the first one only gets WASD
+        scheme = 'wasd' if self.player_keys else None
+        # clicks past MAX_SHOTS stay queued for the next tick
+        shots = min(self._shots, MAX_SHOTS)
+        player_shots = [min(n, MAX_SHOTS) for n in self._player_shots]
+        inp = TickInput.from_keys(keys, shots=shots, restart=self._restart, scheme=scheme)
+        players = [TickInput.from_keys(keys, shots=n, scheme=name)
+                   for (name, _), n in zip(self.player_keys, player_shots)]
+        self._shots -= shots
+        self._player_shots = [n - m for n, m in zip(self._player_shots, player_shots)]
+        self._restart = False
+        return inp, players
 
-            # increase speed
-            self.game_speed += SPEED_INCREMENT
+    def update(self, inp=None):
+        """Step the simulation with `inp`, or with the keyboard and queued clicks if None."""
+        players = ()
+        if inp is None:
+            inp, players = self._take_input()
+        else:
+            self._shots = 0
+            self._player_shots = [0] * len(self.player_keys)
+            self._restart = False
+        if self.recording is not None:
+            self.recording.append(inp)
+        events = self.sim.step(inp, players)
+        for event in events:
+            self._play_event(event)
+        if self.telemetry is not None:
+            self.telemetry.log(self.sim, events)
 
-    def _clear_effect(self):
-        self.effect = None
-        self.effect_bg = None
+    def _play_event(self, event):
+        """Play the sound that goes with a simulation event."""
+        try:
+            if event.type == 'jump':
+                self.sound_jump.play()
+            elif event.type == 'pickup':
+                # play musical note mapped to this collectible kind
+                snd = self.note_sounds.get(event.kind, None)
+                if snd:
+                    snd.play()
+                else:
+                    # fallback eat sound
+                    self.sound_eat.play()
+            elif event.type == 'wolf_kill':
+                self.sound_wolf.play()
+            elif event.type in ('death', 'herd_death') and event.kind == 'obstacle':
+                self.sound_over.play()
+        except Exception:
+            pass
 
     def draw_background(self):
-        # colored theme if mushroom effect
-        if self.effect_bg:
-            bg1 = self.effect_bg
-            bg2 = tuple(min(255, int(c*0.9)) for c in self.effect_bg)
-        else:
-            bg1 = BG_COLOR
-            bg2 = BG_COLOR_ALT
-        tile_h = TILE_SIZE
-        for y in range(0, SCREEN_HEIGHT, tile_h):
-            for x in range(0, SCREEN_WIDTH, TILE_SIZE):
-                color = bg1 if ((x//TILE_SIZE + y//TILE_SIZE) % 2 == 0) else bg2
-                pygame.draw.rect(self.screen, color, (x, y, TILE_SIZE, TILE_SIZE))
-        # ground line
-        pygame.draw.rect(self.screen, (50,160,40), (0, SCREEN_HEIGHT - TILE_SIZE, SCREEN_WIDTH, TILE_SIZE))
-
-    def render(self):
-        self.draw_background()
+        # colored theme if mushroom effect; each theme is pre-rendered once
+        bg = self.backgrounds.get(self.screen.get_size(), self.sim.effect_bg)
+        self.screen.blit(bg, (0, 0))
+        return bg
+
+    def render(self, alpha=1.0):
+        """Draw the game; with alpha < 1 moving things are drawn that far between the last two ticks."""
+        sim = self.sim
+        prof = self.profiler
+        bg = self.backgrounds.get(self.screen.get_size(), sim.effect_bg)
+        # only push changed regions while the last full frame (same screen, same theme) is still up
+        partial = self.dirty_rects and self._shown_state == 'game' and bg is self._shown_bg
+        with prof.phase('background'):
+            if partial:
+                dirty = self._erase(bg)
+            else:
+                self.draw_background()
+                dirty = []
+        # a stopped game-over frame stays up unchanged until input arrives
+        self._shown_state = 'game_over' if sim.game_over and not sim.last_speed else 'game'
+        self._shown_bg = bg
+
         # draw sprites
-        self.collectible_group.draw(self.screen)
-        self.obstacle_group.draw(self.screen)
-        self.wolf_group.draw(self.screen)
-        self.projectile_group.draw(self.screen)
-        self.sheep_group.draw(self.screen)
+        with prof.phase('sprites'):
+            shift, player_shift = self._interpolation(alpha)
+            if sim.entities is not None:
+                self._entity_rects = sim.entities.draw(self.screen, shift if any(shift) else None)
+                dirty += self._entity_rects
+            else:
+                dirty += self._draw_shifted(sim.collectible_group, shift[COLLECTIBLE], 0)
+                dirty += self._draw_shifted(sim.obstacle_group, shift[OBSTACLE], 0)
+                dirty += self._draw_shifted(sim.wolf_group, shift[WOLF], 0)
+                dirty += self._draw_shifted(sim.projectile_group, shift[PROJECTILE], 0)
+            if sim.herd.n:
+                self._herd_rects = sim.herd.draw(self.screen, alpha if self._prev_player is not None else 1.0)
+                dirty += self._herd_rects
+            dirty += self._draw_shifted(sim.sheep_group, *player_shift)
 
         # UI
-        score_surf = self.font.render(f"Score: {self.score}", True, BLACK)
-        self.screen.blit(score_surf, (10,10))
+        with prof.phase('hud'):
+            score_surf = self.text.counter(self.font, "Score: ", sim.score, BLACK)
+            self._hud_rects = [self.screen.blit(score_surf, (10,10))]
+
+            if sim.game_over:
+                over_surf = self.text.render(self.font, "Game Over - Press R to Restart", (200,0,0))
+                rect = over_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+                self._hud_rects.append(self.screen.blit(over_surf, rect))
+            if self.show_profile:
+                self._hud_rects.append(self.profiler.draw_overlay(self.screen, self.small_font))
+        dirty += self._hud_rects
+
+        if self.pixel_observer is not None:
+            with prof.phase('pixels'):
+                self.pixel_observer.capture(self.screen)
+
+        with prof.phase('flip'):
+            self.present(dirty if partial else None)
+
+    def _fit_view(self):
+        """Where the game image goes in the window, centred.
+
+        The largest whole-number scale that fits with INTEGER_SCALING (unless the window
+        is smaller than the game), otherwise the largest same-aspect fit.
+        """
+        win_w, win_h = self.window.get_size()
+        scale = min(win_w // SCREEN_WIDTH, win_h // SCREEN_HEIGHT)
+        if INTEGER_SCALING and scale >= 1:
+            size = (SCREEN_WIDTH * scale, SCREEN_HEIGHT * scale)
+        else:
+            fit = min(win_w / SCREEN_WIDTH, win_h / SCREEN_HEIGHT)
+            size = (int(SCREEN_WIDTH * fit), int(SCREEN_HEIGHT * fit))
+        view = pygame.Rect((0, 0), size)
+        view.center = (win_w // 2, win_h // 2)
+        return view
+
+    def to_game(self, pos):
+        """Window coordinates (mouse events) to game coordinates."""
+        if self.screen is self.window:
+            return pos
+        return ((pos[0] - self.view.x) * SCREEN_WIDTH // self.view.width,
+                (pos[1] - self.view.y) * SCREEN_HEIGHT // self.view.height)
 
-        if self.game_over:
-            over_surf = self.font.render("Game Over - Press R to Restart", True, (200,0,0))
-            rect = over_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(over_surf, rect)
+    def present(self, dirty=None):
+        """Show the frame: all of it, or just the `dirty` rects (game coordinates)."""
+        if self.frame_recorder is not None:
+            self.frame_recorder.capture(self.screen)
+        if self.screen is self.window:
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+            return
+        view = self.view
+        scale = view.width // SCREEN_WIDTH
+        if dirty is None or view.width != SCREEN_WIDTH * scale:
+            # letterbox bars, then the whole frame in one scale
+            for bar in self._bars:
+                self.window.fill(BLACK, bar)
+            pygame.transform.scale(self.screen, view.size, self.window.subsurface(view))
+            pygame.display.flip()
+            return
+        # whole-number scale: nearest-neighbour scaling of each dirty rect on its own is exact
+        bounds = self.screen.get_rect()
+        updated = []
+        for r in dirty:
+            r = r.clip(bounds)
+            if not r:
+                continue
+            out = pygame.Rect(view.x + r.x * scale, view.y + r.y * scale, r.width * scale, r.height * scale)
+            pygame.transform.scale(self.screen.subsurface(r), out.size, self.window.subsurface(out))
+            updated.append(out)
+        pygame.display.update(updated)
 
-        pygame.display.flip()
+    def _interpolation(self, alpha):
+        """Offsets that move the current tick's positions back to `alpha` of the way from the previous one.
 
-    def run_frame(self):
-        self.process_events()
+        Returns per-category x offsets and the sheep's (dx, dy).
+        """
+        back = 1.0 - alpha
+        if back <= 0.0:
+            return (0, 0, 0, 0), (0, 0)
+        # every entity of a category moved int(vx * speed) last tick
+        speed = self.sim.last_speed
+        shift = tuple(-round(back * int(CATEGORY_VX[cat] * speed))
+                      for cat in (COLLECTIBLE, OBSTACLE, WOLF, PROJECTILE))
+        player = (0, 0)
+        if self._prev_player is not None:
+            x, y = self.sim.player.rect.topleft
+            px, py = self._prev_player
+            player = (-round(back * (x - px)), -round(back * (y - py)))
+        return shift, player
+
+    def _draw_shifted(self, group, dx, dy):
+        """group.draw with every rect offset by (dx, dy) for the duration of the draw."""
+        if not dx and not dy:
+            return group.draw(self.screen)
+        sprites = group.sprites()
+        for s in sprites:
+            s.rect.move_ip(dx, dy)
+        try:
+            return group.draw(self.screen)
+        finally:
+            for s in sprites:
+                s.rect.move_ip(-dx, -dy)
+
+    def _erase(self, bg):
+        """Paint the background back over everything drawn last frame; returns those rects."""
+        sim = self.sim
+        for group in (sim.collectible_group, sim.obstacle_group, sim.wolf_group,
+                      sim.projectile_group, sim.sheep_group):
+            # RenderUpdates remembers last frame's rects (and removed sprites) itself
+            group.clear(self.screen, bg)
+        rects = self._entity_rects + self._herd_rects + self._hud_rects
+        for r in rects:
+            self.screen.blit(bg, r, r)
+        return list(rects)
+
+    def run_frame(self, inp=None):
+        events = None
+        if inp is None and self._idle():
+            # nothing on screen can change until input arrives: sleep instead of spinning
+            events = self._wait_events()
+            # time spent waiting is not game time
+            self._frame_start = time.perf_counter()
+        prof = self.profiler
+        prof.begin_frame()
+        now = time.perf_counter()
+        elapsed = now - self._frame_start
+        self._frame_start = now
+        with prof.phase('events'):
+            self.process_events(events)
+        if self.state == 'game' and self._loader is not None:
+            # sounds and backgrounds must be in place before the first game frame
+            self.wait_ready()
+            # time spent loading is not game time
+            self._frame_start = time.perf_counter()
+        if self.sim_process is not None:
+            # the worker only ticks while the game screen is up
+            self.sim_process.pause(self.state != 'game')
         if self.state == 'menu':
-            self.render_menu()
+            if self._needs_redraw():
+                with prof.phase('menu'):
+                    self.render_menu()
         elif self.state == 'rules':
-            self.render_rules()
-        elif self.state == 'game':
-            self.update()
-            self.render()
-        self.clock.tick(FPS)
+            if self._needs_redraw():
+                with prof.phase('menu'):
+                    self.render_rules()
+        elif self.state == 'game' and (inp is not None or not self._idle()):
+            with prof.phase('update'):
+                alpha = self.advance(elapsed, inp)
+            self.render(alpha)
+        prof.end_frame()
+        if self._loader is not None and self._loader.ident is None:
+            # the first frame is up: load the rest in the background
+            startup.mark('first frame')
+            self.start_loading()
+        self.clock.tick(self.fps_limit)
+
+    def _idle(self):
+        """True while the screen shows a static page or a stopped game over that only input can change."""
+        if self.show_profile or self.frame_recorder is not None:
+            return False
+        if self.state in ('menu', 'rules'):
+            return self._shown_state == self.state
+        return self._shown_state == 'game_over' and not self._shots and not any(self._player_shots) and not self._restart
+
+    def _wait_events(self):
+        """Block until an event arrives (or IDLE_WAIT_MS passes); returns the pending events."""
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        return events + pygame.event.get()
+
+    def toggle_profiler(self):
+        """F3: show/hide the timing overlay, starting the profiler the first time."""
+        if not self.profiler.enabled:
+            self.profiler = self.sim.profiler = FrameProfiler()
+        self.show_profile = not self.show_profile
+        # the overlay box has to be erased/drawn in full
+        self._shown_state = None
+
+    def export_profile(self):
+        """F4: write the recorded frames to PROFILE_DIR as JSON and CSV; returns the JSON path."""
+        if not self.profiler.enabled:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, time.strftime('frames-%Y%m%d-%H%M%S'))
+        self.profiler.export_json(base + '.json')
+        self.profiler.export_csv(base + '.csv')
+        return base + '.json'
+
+    def toggle_capture(self):
+        """F5: start or stop recording video to CAPTURE_DIR; returns the finished file when stopping."""
+        if self.frame_recorder is not None:
+            path = self.frame_recorder.close()
+            self.frame_recorder = None
+            return path
+        os.makedirs(CAPTURE_DIR, exist_ok=True)
+        base = os.path.join(CAPTURE_DIR, time.strftime('capture-%Y%m%d-%H%M%S'))
+        from capture import FrameRecorder
+        self.frame_recorder = FrameRecorder(self.screen, base, fps=self.fps_limit or TICK_RATE)
+        return None
+
+    def save_recording(self):
+        """Write the session recording to RECORDING_DIR; returns the path (None if not recording)."""
+        if self.recording is None or not len(self.recording):
+            return None
+        from replay import save_session
+        return save_session(self.recording, self.sim)
+
+    def _needs_redraw(self):
+        """Static screens are only repainted on entry (or after the window lost its contents).
+
+        While capturing video every frame is presented so the footage keeps its frame rate.
+        """
+        if self._shown_state != self.state or self.frame_recorder is not None:
+            self._shown_state = self.state
+            return True
+        return False
+
+    def _static_screen(self, name, compose):
+        """The page drawn by `compose(surface)`, composed once per screen size."""
+        key = (name, self.screen.get_size())
+        page = self._static_screens.get(key)
+        if page is None:
+            page = self._static_screens[key] = self.screen.copy()
+            compose(page)
+        return page
+
     def render_menu(self):
-        self.screen.fill((255, 220, 250))
+        self.screen.blit(self._static_screen('menu', self._compose_menu), (0, 0))
+        self.present()
+
+    def _compose_menu(self, surface):
+        surface.fill((255, 220, 250))
         title = self.font.render("Sheep Runner!", True, (255, 100, 180))
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 120))
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 120))
         # Cute sheep face
-        pygame.draw.ellipse(self.screen, (255,255,255), (360,170,80,50))
-        pygame.draw.circle(self.screen, (255,200,200), (400,195), 20)
-        pygame.draw.circle(self.screen, (0,0,0), (390,195), 5)
-        pygame.draw.circle(self.screen, (0,0,0), (410,195), 5)
+        pygame.draw.ellipse(surface, (255,255,255), (360,170,80,50))
+        pygame.draw.circle(surface, (255,200,200), (400,195), 20)
+        pygame.draw.circle(surface, (0,0,0), (390,195), 5)
+        pygame.draw.circle(surface, (0,0,0), (410,195), 5)
         # Start button
-        pygame.draw.rect(self.screen, (255,240,200), (300,250,200,60), border_radius=20)
+        pygame.draw.rect(surface, (255,240,200), (300,250,200,60), border_radius=20)
         start_txt = self.font.render("Start Game", True, (120,60,200))
-        self.screen.blit(start_txt, (SCREEN_WIDTH//2 - start_txt.get_width()//2, 265))
+        surface.blit(start_txt, (SCREEN_WIDTH//2 - start_txt.get_width()//2, 265))
         # Rules button
-        pygame.draw.rect(self.screen, (220,240,255), (300,320,200,60), border_radius=20)
+        pygame.draw.rect(surface, (220,240,255), (300,320,200,60), border_radius=20)
         rules_txt = self.font.render("Game Rules", True, (60,120,200))
-        self.screen.blit(rules_txt, (SCREEN_WIDTH//2 - rules_txt.get_width()//2, 335))
+        surface.blit(rules_txt, (SCREEN_WIDTH//2 - rules_txt.get_width()//2, 335))
         # Footer
         footer = self.font.render("Click to select", True, (120,120,120))
-        self.screen.blit(footer, (SCREEN_WIDTH//2 - footer.get_width()//2, 400))
-        pygame.display.flip()
+        surface.blit(footer, (SCREEN_WIDTH//2 - footer.get_width()//2, 400))
 
     def render_rules(self):
-        self.screen.fill((240,240,255))
+        self.screen.blit(self._static_screen('rules', self._compose_rules), (0, 0))
+        self.present()
+
+    def _compose_rules(self, surface):
+        surface.fill((240,240,255))
         title = self.font.render("Game Rules", True, (100,100,255))
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 80))
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 80))
         lines = [
             "Control the sheep with A/D or arrow keys.",
             "Jump with Space, W, or Up (double jump possible).",
@@ -315,64 +692,47 @@ class Game:
         ]
         for i, line in enumerate(lines):
             txt = self.font.render(line, True, (80,80,120))
-            self.screen.blit(txt, (SCREEN_WIDTH//2 - txt.get_width()//2, 140 + i*40))
-        pygame.display.flip()
+            surface.blit(txt, (SCREEN_WIDTH//2 - txt.get_width()//2, 140 + i*40))
 
     def run(self):
         while self.running:
             self.run_frame()
+        self.save_recording()
+        self.close()
         pygame.quit()
 
-    def _make_sound(self, freq, duration, volume=0.2, samplerate=44100):
-        """Generate a short sine wave sound and return a pygame Sound object."""
-        n_samples = int(samplerate * duration)
-        buf = bytearray()
-        for i in range(n_samples):
-            t = i / samplerate
-            # simple envelope
-            env = 1.0
-            val = int(volume * 32767 * math.sin(2 * math.pi * freq * t) * env)
-            buf += struct.pack('<h', val)
-        # create pygame Sound from bytes
-        try:
-            sound = pygame.mixer.Sound(buffer=bytes(buf))
-            return sound
-        except Exception:
-            # fallback: silent sound
-            arr = pygame.sndarray.make_sound(pygame.surfarray.array2d(pygame.Surface((1,1))))
-            return arr
+    def close(self):
+        """Stop the audio, capture and telemetry threads and the simulation process (the window stays open)."""
+        if self._loader is not None and self._loader.ident is not None:
+            # a load in progress finishes first, so nothing starts after the shutdown below
+            self.wait_ready()
+        if self.sim_process is not None:
+            self.sim_process.close()
+        if self.frame_recorder is not None:
+            self.toggle_capture()
+        if self.telemetry is not None:
+            self.telemetry.close()
+            self.telemetry = None
+        if self.audio is not None:
+            self.audio.stop()
+            self.audio = None
 
-    def _make_note_sound(self, freq, duration=0.35, volume=0.4, samplerate=44100):
-        """Generate a musical note with a simple ADSR envelope and return a pygame Sound.
+    def _make_sound(self, freq, duration, volume=0.2):
+        """Short sine blip as a pygame Sound (None if there is no mixer)."""
+        return self._tone_sound(freq, duration, volume, 'flat')
 
-        Uses numpy for efficient waveform and envelope generation.
-        """
+    def _make_note_sound(self, freq, duration=0.35, volume=0.4):
+        """Musical note with a simple ADSR envelope as a pygame Sound (None if there is no mixer)."""
+        return self._tone_sound(freq, duration, volume, 'adsr')
+
+    def _tone_sound(self, freq, duration, volume, envelope):
+        import audio
         try:
-            n = int(samplerate * duration)
-            t = np.linspace(0, duration, n, False)
-            # sine waveform
-            wave_data = np.sin(2 * np.pi * freq * t)
-            # simple ADSR envelope
-            attack = int(0.02 * samplerate)
-            decay = int(0.05 * samplerate)
-            release = int(0.12 * samplerate)
-            sustain_len = max(0, n - (attack + decay + release))
-            # build envelope
-            env = np.concatenate([
-                np.linspace(0.0, 1.0, attack, False) if attack > 0 else np.array([]),
-                np.linspace(1.0, 0.7, decay, False) if decay > 0 else np.array([]),
-                np.ones(sustain_len) * 0.7 if sustain_len > 0 else np.array([]),
-                np.linspace(0.7, 0.0, release, False) if release > 0 else np.array([]),
-            ])
-            if env.size < wave_data.size:
-                # pad envelope if rounding made it shorter
-                env = np.pad(env, (0, wave_data.size - env.size), mode='constant', constant_values=(0,))
-            env = env[:wave_data.size]
-            samples = (wave_data * env * (volume * 32767)).astype(np.int16)
-            # mono -> stereo column for pygame
-            arr = samples.reshape(-1, 1)
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
+            samplerate, channels = audio.mixer_format()
+            samples = self.samples.tone(freq, duration, volume, samplerate, envelope)
+            if self.audio is not None:
+                return self.audio.sound(samples)
+            return audio.to_sound(samples, channels)
         except Exception:
-            # fallback to short beep
-            return self._make_sound(freq, min(duration, 0.12), volume=volume)
+            # mixer may be missing in headless/test environments
+            return None
@@ -1,14 +1,64 @@
 import pygame
 
-class Wolf(pygame.sprite.Sprite):
-    """Enemy wolf that moves left."""
-    def __init__(self, x, y):
+
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite recycled through a per-class free list.
+
+    Create instances with Cls.spawn(...) instead of Cls(...): kill() puts the
+    sprite back on its class's free list and spawn() re-initialises one from
+    there via setup() before constructing a new object. Images come from
+    per-class caches and are shared, so never draw onto a pooled sprite's image.
+    """
+    POOL_SIZE = 256
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._free = []
+        cls._images = {}
+
+    @classmethod
+    def spawn(cls, *args, **kwargs):
+        if cls._free:
+            sprite = cls._free.pop()
+            sprite._pooled = False
+            sprite.setup(*args, **kwargs)
+            return sprite
+        return cls(*args, **kwargs)
+
+    def __init__(self, *args, **kwargs):
         super().__init__()
-        self.image = pygame.Surface((OBSTACLE_SIZE, OBSTACLE_SIZE))
-        self.image.fill((128,128,128))
-        pygame.draw.rect(self.image, (80,80,80), (8,8,16,16))
-        pygame.draw.rect(self.image, (255,255,255), (20,12,8,8)) # eye
-        self.rect = self.image.get_rect()
+        self._pooled = False
+        self.setup(*args, **kwargs)
+
+    def kill(self):
+        super().kill()
+        if not self._pooled and len(self._free) < self.POOL_SIZE:
+            self._pooled = True
+            self._free.append(self)
+
+    def _place(self, image):
+        self.image = image
+        if hasattr(self, 'rect'):
+            self.rect.size = image.get_size()
+        else:
+            self.rect = image.get_rect()
+
+
+class Wolf(PooledSprite):
+    """Enemy wolf that moves left."""
+    @classmethod
+    def image_for(cls):
+        image = cls._images.get(None)
+        if image is None:
+            image = pygame.Surface((OBSTACLE_SIZE, OBSTACLE_SIZE))
+            image.fill((128,128,128))
+            pygame.draw.rect(image, (80,80,80), (8,8,16,16))
+            pygame.draw.rect(image, (255,255,255), (20,12,8,8)) # eye
+            cls._images[None] = image
+        return image
+
+    def setup(self, x, y):
+        self._place(self.image_for())
         self.rect.topleft = (x, y)
         self.vx = -4
     def update(self, game_speed):
@@ -16,13 +66,19 @@ class Wolf(pygame.sprite.Sprite):
         if self.rect.right < 0:
             self.kill()
 
-class Projectile(pygame.sprite.Sprite):
+class Projectile(PooledSprite):
     """Projectile fired by sheep."""
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((12,6))
-        self.image.fill((255,220,0))
-        self.rect = self.image.get_rect()
+    @classmethod
+    def image_for(cls):
+        image = cls._images.get(None)
+        if image is None:
+            image = pygame.Surface((12,6))
+            image.fill((255,220,0))
+            cls._images[None] = image
+        return image
+
+    def setup(self, x, y):
+        self._place(self.image_for())
         self.rect.center = (x, y)
         self.vx = 10
     def update(self, game_speed):
@@ -33,9 +89,17 @@ import pygame
 import pygame
 import random
 from config import *
+from schedule import SpawnSchedule
 
+# collectible kinds a spawner picks from and their weights
+# (weights sum to 1.0; more chance for colored mushrooms so the player plays more notes)
+SPAWN_KINDS = ['grass', 'mushroom_pink', 'mushroom_blue', 'mushroom_yellow', 'mushroom_orange', 'mushroom_purple', 'mushroom_cyan']
+SPAWN_WEIGHTS = [0.50, 0.12, 0.12, 0.06, 0.06, 0.07, 0.07]
+# obstacles spawn at this fraction of OBSTACLE_SPAWN_RATE
+OBSTACLE_RATE_SCALE = 0.25
 
-class Collectible(pygame.sprite.Sprite):
+
+class Collectible(PooledSprite):
     """Base class for all collectibles (grass, colored mushrooms)."""
     COLOR_MAP = {
         'grass': (34,139,34),
@@ -54,17 +118,23 @@ class Collectible(pygame.sprite.Sprite):
         'mushroom_purple': (200,162,200),
         'mushroom_cyan': (102,255,255),
     }
-    def __init__(self, x, y, kind='grass', value=SCORE_PER_GRASS):
-        super().__init__()
+    @classmethod
+    def image_for(cls, kind):
+        image = cls._images.get(kind)
+        if image is None:
+            image = pygame.Surface((GRASS_SIZE, GRASS_SIZE))
+            color = cls.COLOR_MAP.get(kind, (255,255,255))
+            image.fill(color)
+            if kind.startswith('mushroom'):
+                pygame.draw.ellipse(image, color, (0,0,GRASS_SIZE,GRASS_SIZE//2))
+                pygame.draw.rect(image, (255,255,255), (GRASS_SIZE//3,GRASS_SIZE//2,GRASS_SIZE//3,GRASS_SIZE//2))
+            cls._images[kind] = image
+        return image
+
+    def setup(self, x, y, kind='grass', value=SCORE_PER_GRASS):
         self.kind = kind
         self.value = value
-        self.image = pygame.Surface((GRASS_SIZE, GRASS_SIZE))
-        color = self.COLOR_MAP.get(kind, (255,255,255))
-        self.image.fill(color)
-        if kind.startswith('mushroom'):
-            pygame.draw.ellipse(self.image, color, (0,0,GRASS_SIZE,GRASS_SIZE//2))
-            pygame.draw.rect(self.image, (255,255,255), (GRASS_SIZE//3,GRASS_SIZE//2,GRASS_SIZE//3,GRASS_SIZE//2))
-        self.rect = self.image.get_rect()
+        self._place(self.image_for(kind))
         self.rect.topleft = (x, y)
 
     def update(self, game_speed):
@@ -72,13 +142,19 @@ class Collectible(pygame.sprite.Sprite):
         if self.rect.right < 0:
             self.kill()
 
-class Obstacle(pygame.sprite.Sprite):
+class Obstacle(PooledSprite):
     """Simple obstacle like stone or stump."""
-    def __init__(self, x, y, w=OBSTACLE_SIZE, h=OBSTACLE_SIZE):
-        super().__init__()
-        self.image = pygame.Surface((w, h))
-        self.image.fill((100,100,100))
-        self.rect = self.image.get_rect()
+    @classmethod
+    def image_for(cls, w=OBSTACLE_SIZE, h=OBSTACLE_SIZE):
+        image = cls._images.get((w, h))
+        if image is None:
+            image = pygame.Surface((w, h))
+            image.fill((100,100,100))
+            cls._images[(w, h)] = image
+        return image
+
+    def setup(self, x, y, w=OBSTACLE_SIZE, h=OBSTACLE_SIZE):
+        self._place(self.image_for(w, h))
         self.rect.topleft = (x, y)
 
     def update(self, game_speed):
@@ -88,33 +164,56 @@ class Obstacle(pygame.sprite.Sprite):
 
 
 class Spawner:
-    def __init__(self, collectible_group, obstacle_group, wolf_group):
+    """Spawns entities each tick, from per-tick rolls or (schedule=True) a SpawnSchedule."""
+    def __init__(self, collectible_group, obstacle_group, wolf_group, rng=None, schedule=False):
         self.collectible_group = collectible_group
         self.obstacle_group = obstacle_group
         self.wolf_group = wolf_group
+        # anything with random()/choices(); pass a seeded random.Random for reproducible runs
+        self.rng = rng if rng is not None else random
+        # per-frame spawn probabilities (tweak per instance for balance runs and benchmarks)
+        self.grass_rate = GRASS_SPAWN_RATE
+        self.obstacle_rate = OBSTACLE_SPAWN_RATE * OBSTACLE_RATE_SCALE  # further reduced rate
+        self.wolf_rate = WOLF_SPAWN_RATE
+        # timeline of upcoming spawns, seeded from rng
+        self.schedule = None
+        if schedule:
+            self.schedule = SpawnSchedule(self, self.rng.getrandbits(128), SPAWN_KINDS, SPAWN_WEIGHTS)
 
     def maybe_spawn(self, game_speed):
+        if self.schedule is not None:
+            for stream, kind in self.schedule.due():
+                if stream == 'collectible':
+                    self.spawn_collectible(SCREEN_WIDTH + 10, SCREEN_HEIGHT - TILE_SIZE - GRASS_SIZE, kind)
+                elif stream == 'obstacle':
+                    self.spawn_obstacle(SCREEN_WIDTH + 20, SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE)
+                else:
+                    self.spawn_wolf(SCREEN_WIDTH + 40, SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE)
+            return
+        rng = self.rng
         # spawn collectibles
-        if random.random() < GRASS_SPAWN_RATE:
+        if rng.random() < self.grass_rate:
             x = SCREEN_WIDTH + 10
             y = SCREEN_HEIGHT - TILE_SIZE - GRASS_SIZE
-            # Increase frequency of colorful mushrooms so player plays more notes
-            kind = random.choices(
-                ['grass', 'mushroom_pink', 'mushroom_blue', 'mushroom_yellow', 'mushroom_orange', 'mushroom_purple', 'mushroom_cyan'],
-                # weights sum to 1.0; more chance for colored mushrooms
-                weights=[0.50, 0.12, 0.12, 0.06, 0.06, 0.07, 0.07]
-            )[0]
-            c = Collectible(x, y, kind=kind)
-            self.collectible_group.add(c)
+            kind = rng.choices(SPAWN_KINDS, weights=SPAWN_WEIGHTS)[0]
+            self.spawn_collectible(x, y, kind)
         # spawn obstacle (further reduced rate)
-        if random.random() < (OBSTACLE_SPAWN_RATE * 0.25):
+        if rng.random() < self.obstacle_rate:
             x = SCREEN_WIDTH + 20
             y = SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE
-            o = Obstacle(x, y)
-            self.obstacle_group.add(o)
+            self.spawn_obstacle(x, y)
         # spawn wolf (reduced rate)
-        if random.random() < 0.003:
+        if rng.random() < self.wolf_rate:
             x = SCREEN_WIDTH + 40
             y = SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE
-            w = Wolf(x, y)
-            self.wolf_group.add(w)
+            self.spawn_wolf(x, y)
+
+    # the spawn_* hooks decide where new entities live; override them to use another store
+    def spawn_collectible(self, x, y, kind):
+        self.collectible_group.add(Collectible.spawn(x, y, kind=kind))
+
+    def spawn_obstacle(self, x, y):
+        self.obstacle_group.add(Obstacle.spawn(x, y))
+
+    def spawn_wolf(self, x, y):
+        self.wolf_group.add(Wolf.spawn(x, y))
@@ -0,0 +1,271 @@
+"""Many sheep stepped together: ghost racers and extra local players.
+
+SheepBatch keeps every extra sheep as one slot in a set of NumPy arrays and
+integrates them all at once with the same rules as Sheep.update (movement,
+multi-jump, gravity, flying, ground clamp, size_mod). Ghost rows follow a
+recorded script of controls (replay.Recording.controls()); player rows take
+a TickInput each tick. Collisions against the shared world come back as one
+sheep x entity overlap matrix, so a tick costs about the same with one
+ghost as with fifty.
+"""
+import numpy as np
+import pygame
+from config import *
+from sheep import Sheep
+
+# surface alpha of ghost sheep
+GHOST_ALPHA = 110
+# colour multiplied into the frames of local players 2, 3, ...
+PLAYER_TINTS = ((255, 170, 170), (170, 190, 255), (255, 230, 140))
+
+# packed script controls
+LEFT, RIGHT, JUMP = 1, 2, 4
+
+
+class SheepBatch:
+    FIELDS = (
+        ('x', np.int64),
+        ('y', np.int64),
+        ('w', np.int64),
+        ('h', np.int64),
+        ('vx', np.int64),
+        ('vy', np.float64),
+        ('jump_count', np.int64),
+        ('prev_jump', np.bool_),
+        ('on_ground', np.bool_),
+        ('flying', np.bool_),
+        ('size_mod', np.float64),
+        ('ticks', np.int64),
+        ('anim', np.int64),
+        ('alive', np.bool_),
+        ('scripted', np.bool_),
+        ('look', np.int64),      # 0 ghost, 1.. local player tint
+        ('score', np.int64),
+        ('prev_x', np.int64),    # position before the last update, for interpolation
+        ('prev_y', np.int64),
+    )
+
+    def __init__(self, capacity=16):
+        self.n = 0
+        self.capacity = capacity
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # scripted controls, one row per sheep, padded to the longest script
+        self._script = np.zeros((capacity, 0), dtype=np.uint8)
+        self._script_len = np.zeros(capacity, dtype=np.int64)
+        self._frames = Sheep(0, 0).frames
+        self._images = {}
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            old = getattr(self, name)
+            arr = np.zeros(self.capacity, dtype=dtype)
+            arr[:self.n] = old[:self.n]
+            setattr(self, name, arr)
+        script = np.zeros((self.capacity, self._script.shape[1]), dtype=np.uint8)
+        script[:self.n] = self._script[:self.n]
+        self._script = script
+        lengths = np.zeros(self.capacity, dtype=np.int64)
+        lengths[:self.n] = self._script_len[:self.n]
+        self._script_len = lengths
+
+    def add(self, x, y, script=None, look=0):
+        """Add a sheep at (x, y); returns its row.
+
+        `script` is a (left, right, jump) triple of boolean arrays, one entry
+        per tick; the sheep follows it and drops out when it runs out.
+        Without one the row is a player driven by update()'s `controls`.
+        """
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.n += 1
+        self.scripted[i] = script is not None
+        self.look[i] = look
+        if script is not None:
+            left, right, jump = (np.asarray(a, dtype=bool) for a in script)
+            codes = (left * LEFT | right * RIGHT | jump * JUMP).astype(np.uint8)
+            if codes.size > self._script.shape[1]:
+                wider = np.zeros((self.capacity, codes.size), dtype=np.uint8)
+                wider[:, :self._script.shape[1]] = self._script
+                self._script = wider
+            self._script[i, :codes.size] = codes
+            self._script[i, codes.size:] = 0
+            self._script_len[i] = codes.size
+        self._reset_rows(slice(i, i + 1), x, y)
+        return i
+
+    def reset(self, x, y):
+        """Put every player back at (x, y), alive; ghosts drop out.
+
+        A restart carries on the spawner instead of rewinding it, so the
+        world no longer matches the one a ghost's script was recorded in.
+        """
+        self._reset_rows(slice(0, self.n), x, y)
+        self.alive[:self.n] &= ~self.scripted[:self.n]
+
+    def _reset_rows(self, rows, x, y):
+        self.x[rows] = x
+        self.y[rows] = y
+        self.prev_x[rows] = x
+        self.prev_y[rows] = y
+        self.w[rows] = SHEEP_SIZE
+        self.h[rows] = SHEEP_SIZE
+        self.vx[rows] = 0
+        self.vy[rows] = 0
+        self.jump_count[rows] = 0
+        self.prev_jump[rows] = False
+        self.on_ground[rows] = True
+        self.flying[rows] = False
+        self.size_mod[rows] = 1.0
+        self.ticks[rows] = 0
+        self.anim[rows] = 0
+        self.alive[rows] = True
+        self.score[rows] = 0
+
+    def players(self):
+        """Rows driven by controls, in the order update() expects them."""
+        return np.flatnonzero(~self.scripted[:self.n])
+
+    def update(self, game_speed, controls=()):
+        """Advance every live sheep one tick, like Sheep.update.
+
+        `controls` holds one TickInput per player row (see players()).
+        Returns the mask of rows that jumped this tick.
+        """
+        n = self.n
+        alive = self.alive[:n]
+        scripted = self.scripted[:n]
+        # scripted rows past the end of their script are done
+        alive &= ~scripted | (self.ticks[:n] < self._script_len[:n])
+        left = np.zeros(n, dtype=bool)
+        right = np.zeros(n, dtype=bool)
+        jump = np.zeros(n, dtype=bool)
+        if scripted.any():
+            rows = np.flatnonzero(scripted & alive)
+            codes = self._script[rows, self.ticks[rows]]
+            left[rows] = codes & LEFT
+            right[rows] = codes & RIGHT
+            jump[rows] = codes & JUMP
+        if len(controls):
+            rows = self.players()
+            pressed = np.array([(c.left, c.right, c.jump) for c in controls], dtype=bool).reshape(-1, 3)
+            left[rows] = pressed[:, 0]
+            right[rows] = pressed[:, 1]
+            jump[rows] = pressed[:, 2]
+
+        live = np.flatnonzero(alive)
+        x, y, w, h = self.x, self.y, self.w, self.h
+        self.prev_x[:n] = x[:n]
+        self.prev_y[:n] = y[:n]
+
+        # size_mod: keep each rect the size of its scaled frame, around the same centre
+        size_mod = self.size_mod[live]
+        size = np.where(size_mod == 1.0, SHEEP_SIZE, (SHEEP_SIZE * size_mod).astype(np.int64))
+        resized = live[(w[live] != size) | (h[live] != size)]
+        if resized.size:
+            new = size[np.isin(live, resized)]
+            cx = x[resized] + w[resized] // 2
+            cy = y[resized] + h[resized] // 2
+            w[resized] = new
+            h[resized] = new
+            x[resized] = cx - new // 2
+            y[resized] = cy - new // 2
+
+        # horizontal movement (right wins when both are held), clamped to the screen
+        vx = np.where(right[live], SHEEP_SPEED, np.where(left[live], -SHEEP_SPEED, 0))
+        self.vx[live] = vx
+        new_x = (x[live] + vx * game_speed).astype(np.int64)
+        x[live] = np.clip(new_x, 0, SCREEN_WIDTH - w[live])
+
+        # multi-jump on a fresh press
+        pressed = jump[live]
+        jumped = pressed & ~self.prev_jump[live] & (self.jump_count[live] < MAX_JUMPS)
+        up = live[jumped]
+        self.vy[up] = SHEEP_JUMP_SPEED
+        self.on_ground[up] = False
+        self.jump_count[up] += 1
+        self.prev_jump[live] = pressed
+
+        # gravity, or the balloon bob while flying
+        vy = self.vy[live]
+        flying = self.flying[live]
+        bob = np.sin(self.ticks[live] * (1000 / TICK_RATE) / 200) * 2
+        vy = np.where(flying, bob, vy + GRAVITY)
+        y[live] += vy.astype(np.int64)
+
+        # ground clamp
+        ground_y = SCREEN_HEIGHT - TILE_SIZE - h[live]
+        landed = y[live] >= ground_y
+        y[live] = np.minimum(y[live], ground_y)
+        vy[landed] = 0
+        self.vy[live] = vy
+        down = live[landed]
+        self.on_ground[down] = True
+        self.jump_count[down] = 0
+
+        self.anim[live] = (self.anim[live] + 1) % len(self._frames)
+        self.ticks[live] += 1
+
+        out = np.zeros(n, dtype=bool)
+        out[up] = True
+        return out
+
+    def overlaps(self, x, y, w, h, rows=None):
+        """(sheep x rects) matrix of which live sheep touch which of the given rects.
+
+        `rows` limits the sheep tested (default all live ones); the same test
+        as pygame.Rect.colliderect. Returns (rows, matrix).
+        """
+        n = self.n
+        if rows is None:
+            rows = np.flatnonzero(self.alive[:n])
+        sx = self.x[rows, None]
+        sy = self.y[rows, None]
+        hit = ((sx < x + w) & (x < sx + self.w[rows, None])
+               & (sy < y + h) & (y < sy + self.h[rows, None]))
+        return rows, hit
+
+    def rect(self, row):
+        return pygame.Rect(int(self.x[row]), int(self.y[row]), int(self.w[row]), int(self.h[row]))
+
+    def _image(self, anim, size, look):
+        key = (anim, size, look)
+        surf = self._images.get(key)
+        if surf is None:
+            surf = self._frames[anim]
+            if size != SHEEP_SIZE:
+                surf = pygame.transform.scale(surf, (size, size))
+            else:
+                surf = surf.copy()
+            if look == 0:
+                surf.set_alpha(GHOST_ALPHA)
+            else:
+                # black stays black, so the colour key still applies
+                surf.fill(PLAYER_TINTS[(look - 1) % len(PLAYER_TINTS)], special_flags=pygame.BLEND_RGB_MULT)
+            self._images[key] = surf
+        return surf
+
+    def draw(self, surface, alpha=1.0):
+        """Blit every live sheep in one call, `alpha` of the way from its previous position.
+
+        Returns the rects drawn.
+        """
+        n = self.n
+        live = np.flatnonzero(self.alive[:n])
+        if not live.size:
+            return []
+        x = self.x[live]
+        y = self.y[live]
+        back = 1.0 - alpha
+        if back > 0.0:
+            x = x - np.round(back * (x - self.prev_x[live])).astype(np.int64)
+            y = y - np.round(back * (y - self.prev_y[live])).astype(np.int64)
+        image = self._image
+        return surface.blits([(image(a, s, k), (px, py)) for a, s, k, px, py in zip(
+            self.anim[live].tolist(), self.w[live].tolist(), self.look[live].tolist(),
+            x.tolist(), y.tolist())])
@@ -1,15 +1,46 @@
-import pygame
+import startup
+with startup.step('import pygame'):
+    import pygame
+with startup.step('import game'):
+    from game import Game
+import argparse
+import threading
 from config import *
-from game import Game
 
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption('Sheep Runner - Pixel Runner')
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sheep Runner - Pixel Runner')
+    parser.add_argument('--startup-report', nargs='?', const='-', metavar='JSON',
+                        help="print startup step timings once everything has loaded (and save them to JSON)")
+    args = parser.parse_args(argv)
 
-    game = Game(screen)
+    with startup.step('display init'):
+        # just what the menu needs; Game opens the mixer on its loader thread
+        pygame.display.init()
+        pygame.font.init()
+    with startup.step('window'):
+        if FULLSCREEN:
+            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            screen = pygame.display.set_mode((SCREEN_WIDTH * WINDOW_SCALE, SCREEN_HEIGHT * WINDOW_SCALE))
+        pygame.display.set_caption('Sheep Runner - Pixel Runner')
+
+    with startup.step('game init'):
+        game = Game(screen)
+
+    report_to = args.startup_report or ('-' if STARTUP_REPORT else None)
+    if report_to:
+        threading.Thread(target=_report_when_ready, args=(game, report_to), name='startup report',
+                         daemon=True).start()
     game.run()
 
+
+def _report_when_ready(game, path):
+    game.ready.wait()
+    rep = startup.report()
+    print(startup.format_report(rep))
+    if path != '-':
+        startup.save_report(path, rep)
+
 if __name__ == '__main__':
     main()
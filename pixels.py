@@ -0,0 +1,100 @@
+"""Pixel observations straight from the rendered frame.
+
+PixelObserver reads the screen through a pygame.surfarray.pixels3d view
+(no copy of the surface), optionally shrinks it by an integer factor (in C,
+into a reused surface) and converts it to grayscale, and writes the result
+into preallocated buffers. A ring of the last `stack` frames gives frame stacking without
+allocating anything per step.
+"""
+from contextlib import contextmanager
+import numpy as np
+import pygame
+import pygame.surfarray
+
+# integer luma weights (sum to 256): gray = (77 R + 150 G + 29 B) >> 8
+LUMA = np.array([77, 150, 29], dtype=np.uint32)
+
+
+@contextmanager
+def pixel_view(surface):
+    """(width, height, 3) uint8 view of `surface`, which is locked while the array lives.
+
+    Leaving the block does not unlock the surface: the `as` name still holds
+    the array. Drop it (and any views taken from it) once done, before the
+    surface is blitted or flipped.
+    """
+    yield pygame.surfarray.pixels3d(surface)
+
+
+class PixelObserver:
+    """Downsampled, optionally grayscale, frame-stacked observations of a surface.
+
+    Frames are stored as (height, width) or (height, width, 3) uint8. With
+    filter='area' each output pixel is (to within rounding) the mean of a
+    factor x factor block; filter='nearest' samples one pixel per block.
+    """
+    def __init__(self, size, factor=1, grayscale=False, stack=1, filter='area'):
+        if filter not in ('area', 'nearest'):
+            raise ValueError(f"unknown filter: {filter!r}")
+        width, height = size
+        self.factor = factor
+        self.grayscale = grayscale
+        self.filter = filter
+        self.width = width // factor
+        self.height = height // factor
+        shape = (self.height, self.width) if grayscale else (self.height, self.width, 3)
+        self.frames = np.zeros((stack,) + shape, dtype=np.uint8)
+        self.count = 0
+        self._stacked = np.zeros_like(self.frames)
+        self._small = None
+        # scratch buffers for grayscale, in the surface's (x, y) order
+        self._acc = np.zeros((self.width, self.height, 3), dtype=np.uint32)
+        self._gray = np.zeros((self.width, self.height), dtype=np.uint32)
+
+    @property
+    def stack(self):
+        return len(self.frames)
+
+    @property
+    def latest(self):
+        """The most recent frame (a view into the ring)."""
+        return self.frames[(self.count - 1) % self.stack]
+
+    def capture(self, surface):
+        """Read `surface` into the next ring slot and return that frame."""
+        src = surface
+        if self.factor != 1:
+            # downsample in C into a reused surface; smoothscale averages when shrinking
+            size = (self.width, self.height)
+            if self._small is None or self._small.get_bitsize() != surface.get_bitsize():
+                self._small = pygame.Surface(size, 0, surface)
+            scale = pygame.transform.smoothscale if self.filter == 'area' else pygame.transform.scale
+            src = scale(surface.subsurface((0, 0, size[0] * self.factor, size[1] * self.factor)),
+                        size, self._small)
+        dst = self.frames[self.count % self.stack]
+        with pixel_view(src) as view:
+            if self.grayscale:
+                np.copyto(self._acc, view)
+                np.dot(self._acc, LUMA, out=self._gray)
+                np.right_shift(self._gray, 8, out=self._gray)
+                np.copyto(dst, self._gray.T, casting='unsafe')
+            else:
+                np.copyto(dst, view.transpose(1, 0, 2))
+        # unlock src now rather than when capture returns
+        del view
+        self.count += 1
+        return dst
+
+    def stacked(self):
+        """The last `stack` frames, oldest first, in a reused buffer."""
+        k = self.stack
+        head = self.count % k
+        out = self._stacked
+        # ring slots [head:] are older than [:head]
+        out[:k - head] = self.frames[head:]
+        out[k - head:] = self.frames[:head]
+        return out
+
+    def clear(self):
+        self.frames.fill(0)
+        self.count = 0
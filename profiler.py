@@ -0,0 +1,171 @@
+"""Per-phase frame profiler.
+
+Times named phases of each frame (events, simulation steps, drawing, flip)
+into a fixed-size ring buffer, reports p50/p95/p99 per phase, draws an
+in-game overlay and exports the recorded frames as JSON or CSV.
+"""
+import csv
+import json
+import time
+import numpy as np
+import pygame
+from config import *
+
+
+class _Phase:
+    """Reusable context manager that adds its elapsed time to one phase column."""
+    __slots__ = ('profiler', 'column', 'start')
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc):
+        p = self.profiler
+        p.column_data[self.column][p.row] += p.clock() - self.start
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every call is a no-op."""
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    """Ring buffer of the last `capacity` frames, seconds per phase plus the whole frame."""
+    enabled = True
+    OVERLAY_REFRESH = 30
+
+    def __init__(self, capacity=PROFILER_FRAMES, clock=time.perf_counter):
+        self.capacity = capacity
+        self.clock = clock
+        self.names = ['frame']
+        self.column_data = [np.zeros(capacity)]
+        self._phases = {}
+        self.frames = 0
+        self.row = 0
+        self._frame_start = None
+        self._overlay = None
+        self._overlay_frame = 0
+
+    def phase(self, name):
+        """Context manager timing `name` within the current frame."""
+        ph = self._phases.get(name)
+        if ph is None:
+            self.names.append(name)
+            self.column_data.append(np.zeros(self.capacity))
+            ph = self._phases[name] = _Phase(self, len(self.names) - 1)
+        return ph
+
+    def begin_frame(self):
+        self.row = self.frames % self.capacity
+        for col in self.column_data:
+            col[self.row] = 0.0
+        self._frame_start = self.clock()
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        self.column_data[0][self.row] = self.clock() - self._frame_start
+        self._frame_start = None
+        self.frames += 1
+
+    def _ordered(self):
+        """Recorded rows in chronological order, one (frames, phases) array in seconds."""
+        n = min(self.frames, self.capacity)
+        data = np.stack(self.column_data, axis=1)
+        if self.frames > self.capacity:
+            data = np.roll(data, -(self.frames % self.capacity), axis=0)
+        return data[:n]
+
+    def stats(self):
+        """{phase: {'mean', 'p50', 'p95', 'p99', 'max'}} in milliseconds over the buffer."""
+        data = self._ordered() * 1000.0
+        out = {}
+        if not len(data):
+            return out
+        p50, p95, p99 = np.percentile(data, [50, 95, 99], axis=0)
+        for i, name in enumerate(self.names):
+            out[name] = {
+                'mean': float(data[:, i].mean()),
+                'p50': float(p50[i]),
+                'p95': float(p95[i]),
+                'p99': float(p99[i]),
+                'max': float(data[:, i].max()),
+            }
+        return out
+
+    def export_json(self, path):
+        data = self._ordered() * 1000.0
+        with open(path, 'w') as f:
+            json.dump({
+                'unit': 'ms',
+                'phases': self.names,
+                'stats': self.stats(),
+                'frames': data.round(4).tolist(),
+            }, f, indent=1)
+
+    def export_csv(self, path):
+        data = self._ordered() * 1000.0
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.names)
+            for row in data:
+                writer.writerow([f"{v:.4f}" for v in row])
+
+    def draw_overlay(self, surface, font, pos=(10, 40)):
+        """Draw p50/p95/p99 per phase in a translucent box; returns the rect covered.
+
+        The box is rebuilt every OVERLAY_REFRESH frames so the overlay itself
+        barely shows up in the numbers.
+        """
+        if self._overlay is None or self.frames - self._overlay_frame >= self.OVERLAY_REFRESH:
+            self._overlay = self._render_overlay(font)
+            self._overlay_frame = self.frames
+        return surface.blit(self._overlay, pos)
+
+    def _render_overlay(self, font):
+        stats = self.stats()
+        lines = [f"{'phase':<22}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name in self.names:
+            if name in stats:
+                st = stats[name]
+                lines.append(f"{name:<22}{st['p50']:7.2f}{st['p95']:7.2f}{st['p99']:7.2f}")
+        surfs = [font.render(line, True, WHITE) for line in lines]
+        w = max(s.get_width() for s in surfs) + 8
+        h = sum(s.get_height() for s in surfs) + 8
+        box = pygame.Surface((w, h), pygame.SRCALPHA)
+        box.fill((0, 0, 0, 170))
+        y = 4
+        for s in surfs:
+            box.blit(s, (4, y))
+            y += s.get_height()
+        return box
@@ -0,0 +1,220 @@
+"""Input recording and deterministic replay.
+
+A recording is the Simulation seed plus one byte per tick holding the
+TickInput (left/right/jump/restart bits and the shot count), zlib-packed.
+The simulation only depends on its seed and its inputs, so stepping a
+fresh Simulation through the same bytes reproduces the session exactly;
+the header keeps the final score and death tick to check that.
+
+    python replay.py recordings/*.sheeprec           # replay headless at full speed and verify
+    python replay.py --watch recordings/run.sheeprec # play it back in the window in real time
+"""
+import argparse
+import glob
+import os
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+from config import *
+from simulation import Simulation, TickInput
+
+MAGIC = b'SHEEPREC'
+VERSION = 1
+# magic, version, entity backend, spawn mode, seed, ticks, score, death tick (-1: alive)
+HEADER = struct.Struct('<8sHBBqIqq')
+BACKENDS = ('sprites', 'numpy')
+SPAWN_MODES = ('rolls', 'schedule')
+
+# input byte: bit 0 left, 1 right, 2 jump, 3 restart, bits 4-7 shots this tick
+LEFT, RIGHT, JUMP, RESTART = 1, 2, 4, 8
+
+
+def encode_input(inp):
+    if not 0 <= inp.shots <= MAX_SHOTS:
+        raise ValueError(f"{inp.shots} shots in one tick; a recording holds 0 to {MAX_SHOTS}")
+    code = inp.shots << 4
+    if inp.left:
+        code |= LEFT
+    if inp.right:
+        code |= RIGHT
+    if inp.jump:
+        code |= JUMP
+    if inp.restart:
+        code |= RESTART
+    return code
+
+
+def decode_input(code):
+    return TickInput(left=code & LEFT, right=code & RIGHT, jump=code & JUMP,
+                     shots=code >> 4, restart=code & RESTART)
+
+
+# Simulation never modifies its input, so every byte maps to one shared TickInput
+_DECODED = [decode_input(code) for code in range(256)]
+
+
+class Recording:
+    """The seed and per-tick inputs of one session (restarts included)."""
+    def __init__(self, seed, entities='sprites', spawns=SPAWN_MODE, inputs=b''):
+        if not isinstance(seed, int):
+            raise ValueError(f"only integer seeds can be recorded, got {seed!r}")
+        if entities not in BACKENDS:
+            raise ValueError(f"unknown entity backend: {entities!r}")
+        if spawns not in SPAWN_MODES:
+            raise ValueError(f"unknown spawn mode: {spawns!r}")
+        self.seed = seed
+        self.entities = entities
+        self.spawns = spawns
+        self.data = bytearray(inputs)
+        # outcome of the recorded session, filled in by finish()
+        self.score = None
+        self.death_tick = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def append(self, inp):
+        self.data.append(encode_input(inp))
+
+    def inputs(self):
+        """The recorded TickInputs, in order."""
+        return (_DECODED[code] for code in self.data)
+
+    def controls(self):
+        """Left, right and jump of the first session (up to the first restart) as boolean arrays.
+
+        This is the script a herd.SheepBatch ghost follows.
+        """
+        codes = np.frombuffer(bytes(self.data), dtype=np.uint8)
+        restarts = np.flatnonzero(codes & RESTART)
+        if restarts.size:
+            codes = codes[:restarts[0]]
+        return (codes & LEFT) != 0, (codes & RIGHT) != 0, (codes & JUMP) != 0
+
+    def finish(self, sim):
+        """Note the outcome to verify replays against."""
+        self.score = sim.score
+        self.death_tick = sim.death_tick
+
+    def save(self, path):
+        death = -1 if self.death_tick is None else self.death_tick
+        header = HEADER.pack(MAGIC, VERSION, BACKENDS.index(self.entities), SPAWN_MODES.index(self.spawns),
+                             self.seed, len(self.data), self.score or 0, death)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(zlib.compress(bytes(self.data), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            blob = f.read()
+        magic, version, backend, spawns, seed, ticks, score, death = HEADER.unpack_from(blob)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} recording")
+        rec = cls(seed, BACKENDS[backend], SPAWN_MODES[spawns], zlib.decompress(blob[HEADER.size:]))
+        if len(rec) != ticks:
+            raise ValueError(f"{path}: expected {ticks} ticks, found {len(rec)}")
+        rec.score = score
+        rec.death_tick = None if death < 0 else death
+        return rec
+
+
+def save_session(recording, sim, directory=RECORDING_DIR):
+    """Note `sim`'s outcome and write `recording` to a new timestamped file in `directory`; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime('session-%Y%m%d-%H%M%S.sheeprec'))
+    recording.finish(sim)
+    recording.save(path)
+    return path
+
+
+def ghosts(directory=RECORDING_DIR, count=GHOSTS):
+    """Up to `count` recordings to race against: the newest one and the newest others on its seed."""
+    paths = sorted(glob.glob(os.path.join(directory, '*.sheeprec')), key=os.path.getmtime, reverse=True)
+    found = []
+    for path in paths:
+        if len(found) == count:
+            break
+        try:
+            rec = Recording.load(path)
+        except (OSError, ValueError, struct.error, zlib.error):
+            continue
+        if not found or (rec.seed, rec.spawns) == (found[0].seed, found[0].spawns):
+            found.append(rec)
+    return found
+
+
+def replay(recording):
+    """Step a fresh Simulation through `recording` as fast as possible; returns it."""
+    sim = Simulation(seed=recording.seed, entities=recording.entities, spawns=recording.spawns)
+    step = sim.step
+    for inp in recording.inputs():
+        step(inp)
+    return sim
+
+
+def verify(recording, sim):
+    """Differences between the recorded outcome and `sim` (empty if it reproduced)."""
+    problems = []
+    if recording.score is not None and sim.score != recording.score:
+        problems.append(f"score {sim.score} != recorded {recording.score}")
+    if sim.death_tick != recording.death_tick:
+        problems.append(f"death tick {sim.death_tick} != recorded {recording.death_tick}")
+    return problems
+
+
+def watch(recording):
+    """Play `recording` back in a window, one tick per frame at TICK_RATE; returns the Simulation."""
+    import pygame
+    from game import Game
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption('Sheep Runner - Replay')
+    # watching is not a session of its own: nothing is recorded or logged, and no ghosts
+    game = Game(screen, sim_process=False, record=False, telemetry=False, ghosts=0)
+    game.sim = Simulation(seed=recording.seed, entities=recording.entities, spawns=recording.spawns)
+    game.sim.profiler = game.profiler
+    game.state = 'game'
+    game.fps_limit = TICK_RATE
+    for inp in recording.inputs():
+        if not game.running:
+            break
+        game.run_frame(inp)
+    sim = game.sim
+    game.close()
+    pygame.quit()
+    return sim
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recordings', nargs='+')
+    parser.add_argument('--watch', action='store_true', help="render in real time instead of replaying headless")
+    args = parser.parse_args(argv)
+
+    # expand patterns ourselves, Windows shells don't
+    paths = [p for arg in args.recordings for p in (sorted(glob.glob(arg)) or [arg])]
+    status = 0
+    total_ticks = 0
+    start = time.perf_counter()
+    for path in paths:
+        rec = Recording.load(path)
+        sim = watch(rec) if args.watch else replay(rec)
+        total_ticks += len(rec)
+        problems = verify(rec, sim)
+        if problems:
+            status = 1
+            print(f"{path}: MISMATCH ({'; '.join(problems)})")
+        else:
+            print(f"{path}: ok, {len(rec)} ticks, score {sim.score}")
+    elapsed = time.perf_counter() - start
+    if len(paths) > 1 or not args.watch:
+        print(f"{len(paths)} recording(s), {total_ticks} ticks in {elapsed:.2f}s "
+              f"({total_ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
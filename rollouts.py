@@ -0,0 +1,351 @@
+"""Parallel headless rollouts for balance sweeps.
+
+Spreads seeded Simulation sessions over a multiprocessing pool. Each
+worker streams its per-tick (observation, action, reward) records to the
+parent through its own shared-memory ring buffer, so the bulk data is
+never pickled. Only the small per-session summary (score, length, death
+cause) comes back as a pool result; those summaries are gathered into one
+report grouped by the config parameters being swept.
+
+    python rollouts.py --sessions 200 --sweep GRASS_SPAWN_RATE=0.01,0.02,0.04
+    python rollouts.py --sweep OBSTACLE_SPAWN_RATE=0.01,0.02 --sweep SPEED_INCREMENT=0.001,0.002
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory, util
+import numpy as np
+from config import *
+from grass import OBSTACLE_RATE_SCALE
+from simulation import Simulation, TickInput
+from vecenv import (OBS_SIZE, NO_ENTITY, observe_simulation,
+                    ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_SHOOT)
+
+# config parameters a sweep may override
+SWEEPABLE = ('GRASS_SPAWN_RATE', 'OBSTACLE_SPAWN_RATE', 'SPEED_INCREMENT', 'INITIAL_GAME_SPEED', 'WOLF_SPAWN_RATE')
+
+STEP_DTYPE = np.dtype([
+    ('session', np.int32),
+    ('tick', np.int32),
+    ('obs', np.float32, (OBS_SIZE,)),
+    ('action', np.int8),
+    ('reward', np.float32),
+    ('done', np.bool_),
+])
+
+
+class ShmRing:
+    """Single-producer/single-consumer ring of STEP_DTYPE records in shared memory.
+
+    The first 16 bytes hold the total records written and read; the producer
+    only advances the write count after the records are in place.
+    """
+    HEADER = 16
+
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self.counters = np.ndarray((2,), dtype=np.int64, buffer=shm.buf)
+        self.records = np.ndarray((capacity,), dtype=STEP_DTYPE, buffer=shm.buf, offset=self.HEADER)
+
+    @classmethod
+    def create(cls, capacity):
+        shm = shared_memory.SharedMemory(create=True, size=cls.HEADER + capacity * STEP_DTYPE.itemsize)
+        ring = cls(shm, capacity, owner=True)
+        ring.counters[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity):
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, batch):
+        """Append records, waiting for the reader while the ring is full."""
+        done = 0
+        n = len(batch)
+        while done < n:
+            written, read = int(self.counters[0]), int(self.counters[1])
+            free = self.capacity - (written - read)
+            if free == 0:
+                time.sleep(0.0005)
+                continue
+            start = written % self.capacity
+            k = min(n - done, free, self.capacity - start)
+            self.records[start:start + k] = batch[done:done + k]
+            self.counters[0] = written + k
+            done += k
+
+    def read(self):
+        """Copy out everything written since the last read."""
+        written, read = int(self.counters[0]), int(self.counters[1])
+        if written == read:
+            return None
+        start = read % self.capacity
+        end = start + (written - read)
+        if end <= self.capacity:
+            out = self.records[start:end].copy()
+        else:
+            out = np.concatenate([self.records[start:], self.records[:end - self.capacity]])
+        self.counters[1] = written
+        return out
+
+    def close(self):
+        # drop the numpy views before closing the mapping
+        self.counters = self.records = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# -- policies (module level so workers can look them up by name) ------------
+
+def policy_random(obs, rng):
+    return rng.randrange(16)
+
+
+def policy_heuristic(obs, rng):
+    """Run right, jump over whatever is close ahead, shoot wolves in range."""
+    action = ACTION_RIGHT if obs[0] < SCREEN_WIDTH // 3 else 0
+    obstacle_dx, wolf_dx = obs[5], obs[7]
+    if 0 <= obstacle_dx < 60 or 0 <= wolf_dx < 50:
+        action |= ACTION_JUMP
+    if wolf_dx != NO_ENTITY and wolf_dx < 400 and rng.random() < 0.2:
+        action |= ACTION_SHOOT
+    return action
+
+
+POLICIES = {
+    'random': policy_random,
+    'heuristic': policy_heuristic,
+}
+
+
+def make_simulation(seed, params):
+    """A Simulation with `params` (names from SWEEPABLE) applied on top of config.py."""
+    sim = Simulation(seed=seed)
+    sp = sim.spawner
+    if 'GRASS_SPAWN_RATE' in params:
+        sp.grass_rate = params['GRASS_SPAWN_RATE']
+    if 'OBSTACLE_SPAWN_RATE' in params:
+        # scaled down the way Spawner scales the configured rate
+        sp.obstacle_rate = params['OBSTACLE_SPAWN_RATE'] * OBSTACLE_RATE_SCALE
+    if 'WOLF_SPAWN_RATE' in params:
+        sp.wolf_rate = params['WOLF_SPAWN_RATE']
+    if 'SPEED_INCREMENT' in params:
+        sim.speed_increment = params['SPEED_INCREMENT']
+    if 'INITIAL_GAME_SPEED' in params:
+        sim.game_speed = params['INITIAL_GAME_SPEED']
+    return sim
+
+
+# -- worker side -------------------------------------------------------------
+
+_ring = None
+CHUNK = 512
+# how often the parent empties the rings while sessions run
+DRAIN_SECONDS = 0.005
+
+
+def _init_worker(names, capacity, slots):
+    global _ring
+    _ring = ShmRing.attach(names[slots.get()], capacity)
+    # detach when the worker exits; only the parent unlinks the ring
+    util.Finalize(_ring, _ring.close, exitpriority=10)
+
+
+def run_session(job):
+    """Play one session to its death (or max_ticks); streams steps, returns the summary."""
+    session, seed, params, policy_name, max_ticks = job
+    sim = make_simulation(seed, params)
+    policy = POLICIES[policy_name]
+    rng = random.Random(seed)
+    chunk = np.zeros(CHUNK, dtype=STEP_DTYPE)
+    fill = 0
+    cause = 'timeout'
+    obs = observe_simulation(sim)
+    for tick in range(max_ticks):
+        action = policy(obs, rng)
+        score = sim.score
+        events = sim.step(TickInput(
+            left=action & ACTION_LEFT, right=action & ACTION_RIGHT,
+            jump=action & ACTION_JUMP, shots=1 if action & ACTION_SHOOT else 0))
+        rec = chunk[fill]
+        rec['session'] = session
+        rec['tick'] = tick
+        rec['obs'] = obs
+        rec['action'] = action
+        rec['reward'] = sim.score - score
+        rec['done'] = sim.game_over
+        fill += 1
+        if fill == CHUNK:
+            _ring.write(chunk)
+            fill = 0
+        if sim.game_over:
+            cause = next(e.kind for e in events if e.type == 'death')
+            break
+        obs = observe_simulation(sim)
+    if fill:
+        _ring.write(chunk[:fill])
+    return {
+        'session': session,
+        'seed': seed,
+        'params': params,
+        'score': sim.score,
+        'ticks': sim.tick,
+        'cause': cause,
+    }
+
+
+# -- parent side -------------------------------------------------------------
+
+class StepStats:
+    """Default consumer for streamed steps: totals per session."""
+    def __init__(self):
+        self.steps = 0
+        self.reward = {}
+
+    def __call__(self, records):
+        self.steps += len(records)
+        sessions, inverse = np.unique(records['session'], return_inverse=True)
+        sums = np.bincount(inverse, weights=records['reward'])
+        for s, r in zip(sessions.tolist(), sums.tolist()):
+            self.reward[s] = self.reward.get(s, 0.0) + r
+
+
+def run_rollouts(param_sets, sessions_per_set, seed=0, policy='heuristic', max_ticks=TICK_RATE * 60 * 10,
+                 workers=None, ring_capacity=1 << 15, on_steps=None):
+    """Play `sessions_per_set` seeded sessions for each params dict; returns the session summaries.
+
+    `on_steps(records)` receives STEP_DTYPE arrays as workers stream them.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = []
+    for params in param_sets:
+        for i in range(sessions_per_set):
+            jobs.append((len(jobs), seed + i, dict(params), policy, max_ticks))
+
+    rings = [ShmRing.create(ring_capacity) for _ in range(workers)]
+    ctx = mp.get_context()
+    slots = ctx.Queue()
+    for i in range(workers):
+        slots.put(i)
+    results = []
+    finished = threading.Event()
+    if not jobs:
+        finished.set()
+
+    def collect(result):
+        # runs on the pool's result thread
+        results.append(result)
+        if len(results) == len(jobs):
+            finished.set()
+
+    def drain():
+        for ring in rings:
+            records = ring.read()
+            if records is not None and on_steps:
+                on_steps(records)
+
+    try:
+        with ctx.Pool(workers, initializer=_init_worker,
+                      initargs=([r.name for r in rings], ring_capacity, slots)) as pool:
+            pending = [pool.apply_async(run_session, (job,), callback=collect,
+                                        error_callback=lambda e: finished.set()) for job in jobs]
+            # workers block while their ring is full, so keep draining until the last session is in
+            while not finished.wait(DRAIN_SECONDS):
+                drain()
+            for p in pending:
+                # re-raise worker errors
+                if p.ready() and not p.successful():
+                    p.get()
+            drain()
+            # let the workers exit on their own so they detach from their rings
+            pool.close()
+            pool.join()
+    finally:
+        for ring in rings:
+            ring.close()
+    results.sort(key=lambda r: r['session'])
+    return results
+
+
+def summarize(results):
+    """One report row per parameter set."""
+    groups = {}
+    for r in results:
+        groups.setdefault(json.dumps(r['params'], sort_keys=True), []).append(r)
+    report = []
+    for key, rows in groups.items():
+        scores = np.array([r['score'] for r in rows])
+        ticks = np.array([r['ticks'] for r in rows])
+        causes = {}
+        for r in rows:
+            causes[r['cause']] = causes.get(r['cause'], 0) + 1
+        report.append({
+            'params': json.loads(key),
+            'sessions': len(rows),
+            'score_mean': float(scores.mean()),
+            'score_median': float(np.median(scores)),
+            'score_max': int(scores.max()),
+            'ticks_mean': float(ticks.mean()),
+            'causes': causes,
+        })
+    return report
+
+
+def _parse_sweep(items):
+    axes = []
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in SWEEPABLE or not values:
+            raise ValueError(f"bad --sweep {item!r}; use NAME=v1,v2 with NAME in {', '.join(SWEEPABLE)}")
+        axes.append([(name, float(v)) for v in values.split(',')])
+    return [dict(combo) for combo in itertools.product(*axes)] if axes else [{}]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=32, help="sessions per parameter set")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', default='heuristic', choices=sorted(POLICIES))
+    parser.add_argument('--max-ticks', type=int, default=TICK_RATE * 60 * 10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sweep', action='append', default=[], metavar='NAME=v1,v2')
+    parser.add_argument('--json', help="write the report to this file")
+    args = parser.parse_args(argv)
+    try:
+        param_sets = _parse_sweep(args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = StepStats()
+    start = time.perf_counter()
+    results = run_rollouts(param_sets, args.sessions, seed=args.seed, policy=args.policy,
+                           max_ticks=args.max_ticks, workers=args.workers, on_steps=stats)
+    elapsed = time.perf_counter() - start
+    report = summarize(results)
+    print(f"{len(results)} sessions, {stats.steps} steps in {elapsed:.1f}s ({stats.steps / elapsed:.0f} steps/s)")
+    for row in report:
+        causes = ', '.join(f"{k} {v}" for k, v in sorted(row['causes'].items()))
+        print(f"{json.dumps(row['params'])}: score mean {row['score_mean']:.1f} "
+              f"median {row['score_median']:.0f} max {row['score_max']}, "
+              f"ticks mean {row['ticks_mean']:.0f}; {causes}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'sessions': results, 'report': report}, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
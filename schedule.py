@@ -0,0 +1,101 @@
+"""Precomputed spawn timeline.
+
+Instead of rolling three random numbers every tick, SpawnSchedule draws
+the gaps between spawns in batches with NumPy: a per-tick chance p gives
+geometrically distributed gaps (mean 1/p ticks), so the timeline has the
+same spawn statistics as the per-tick rolls. Collectible kinds are drawn
+with the same weights. Each stream (collectibles, obstacles, wolves) has
+its own generator seeded from the one seed, and at least `lookahead`
+ticks of every stream are always known, so upcoming() is just a read.
+"""
+from collections import deque
+from itertools import takewhile
+import numpy as np
+from config import *
+
+STREAMS = ('collectible', 'obstacle', 'wolf')
+
+
+class SpawnSchedule:
+    """Spawn events for `spawner`, popped with due() once per spawner tick.
+
+    Rates are read from spawner.grass_rate / obstacle_rate / wolf_rate when
+    a stream is extended, so a rate change applies to spawns past the
+    already-generated window (set rates before the first tick, or call
+    refresh()).
+    """
+    def __init__(self, spawner, seed, kinds, weights, lookahead=SPAWN_LOOKAHEAD, batch=256):
+        self.spawner = spawner
+        self.kinds = np.array(kinds)
+        self.weights = np.array(weights, dtype=np.float64)
+        self.weights /= self.weights.sum()
+        self.lookahead = lookahead
+        self.batch = batch
+        self._seeds = np.random.SeedSequence(seed).spawn(len(STREAMS))
+        self.tick = 0
+        self.refresh()
+
+    def refresh(self):
+        """Drop everything generated ahead of now and regenerate from the current rates."""
+        self._rngs = [np.random.default_rng(s.spawn(1)[0]) for s in self._seeds]
+        self._ticks = [deque() for _ in STREAMS]
+        self._kinds = deque()
+        # last tick generated for each stream
+        self._horizon = [self.tick] * len(STREAMS)
+        # earliest queued spawn and lowest horizon, for due()'s fast path
+        self._next = self._low = self.tick
+
+    def _rates(self):
+        sp = self.spawner
+        return (sp.grass_rate, sp.obstacle_rate, sp.wolf_rate)
+
+    def _extend(self, stream):
+        rate = min(self._rates()[stream], 1.0)
+        start = self._horizon[stream]
+        if rate <= 0:
+            # nothing will spawn; look again once this stretch has passed
+            self._horizon[stream] = start + self.lookahead + self.batch
+            return
+        rng = self._rngs[stream]
+        ticks = start + np.cumsum(rng.geometric(rate, self.batch))
+        self._ticks[stream].extend(ticks.tolist())
+        self._horizon[stream] = int(ticks[-1])
+        if stream == 0:
+            picks = rng.choice(len(self.kinds), size=self.batch, p=self.weights)
+            self._kinds.extend(self.kinds[picks].tolist())
+
+    def due(self):
+        """Advance one tick; returns the (stream, kind) spawns for it in stream order."""
+        self.tick = tick = self.tick + 1
+        # most ticks spawn nothing and need no new batch
+        if tick < self._next and tick + self.lookahead <= self._low:
+            return ()
+        horizon = tick + self.lookahead
+        out = []
+        for stream, name in enumerate(STREAMS):
+            while self._horizon[stream] < horizon:
+                self._extend(stream)
+            queue = self._ticks[stream]
+            # gaps are at least one tick, so a stream spawns at most once per tick
+            if queue and queue[0] <= tick:
+                queue.popleft()
+                out.append((name, self._kinds.popleft() if stream == 0 else None))
+        self._next = min((q[0] for q in self._ticks if q), default=horizon + 1)
+        self._low = min(self._horizon)
+        return out
+
+    def upcoming(self, ticks=None):
+        """Known spawns in the next `ticks` (default and at most lookahead) ticks.
+
+        A sorted list of (ticks from now, stream, kind).
+        """
+        limit = self.tick + min(ticks or self.lookahead, self.lookahead)
+        events = []
+        for stream, name in enumerate(STREAMS):
+            soon = takewhile(lambda t: t <= limit, self._ticks[stream])
+            if stream == 0:
+                events += [(t - self.tick, name, kind) for t, kind in zip(soon, self._kinds)]
+            else:
+                events += [(t - self.tick, name, None) for t in soon]
+        events.sort(key=lambda e: (e[0], STREAMS.index(e[1])))
+        return events
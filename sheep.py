@@ -1,9 +1,13 @@
 import pygame
 import math
+from collections import OrderedDict
 from config import *
 
 class Sheep(pygame.sprite.Sprite):
     """Player sheep sprite. Simple rectangle/pixel placeholder animations."""
+    # how many scaled frames to keep; (frame index, scale) pairs beyond this are evicted LRU
+    SCALED_FRAME_CACHE = 16
+
     def __init__(self, x, y):
         super().__init__()
         self.width = SHEEP_SIZE
@@ -29,6 +33,7 @@ class Sheep(pygame.sprite.Sprite):
                 pygame.draw.rect(surf, (120,120,120), (12,24,4,8))
                 pygame.draw.rect(surf, (120,120,120), (16,24,4,8))
         self.anim_index = 0
+        self._scaled = OrderedDict()
         self.image = self.frames[self.anim_index]
         self.rect = self.image.get_rect()
         self.rect.topleft = (x, y)
@@ -41,24 +46,29 @@ class Sheep(pygame.sprite.Sprite):
         self.size_mod = 1.0
         self.flying = False
         self.prev_jump_pressed = False
+        self.last_jumped = False
+        # ticks simulated so far; drives the balloon bob instead of wall-clock time
+        self.ticks = 0
 
-    def update(self, keys, game_speed):
-        # apply size_mod (grow effect)
-        if self.size_mod != 1.0:
-            w = int(self.width * self.size_mod)
-            h = int(self.height * self.size_mod)
-            self.image = pygame.transform.scale(self.frames[self.anim_index], (w, h))
-            self.rect = self.image.get_rect(center=self.rect.center)
+    def update(self, controls, game_speed):
+        """Advance one tick. `controls` is a simulation.TickInput (left/right/jump)."""
+        # apply size_mod (grow effect): keep the rect the size of the scaled frame
+        size = self._frame_size()
+        if self.rect.size != size:
+            center = self.rect.center
+            self.rect.size = size
+            self.rect.center = center
+            self.image = self.frame(self.anim_index)
         # horizontal movement
         self.vx = 0
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        if controls.left:
             self.vx = -SHEEP_SPEED
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        if controls.right:
             self.vx = SHEEP_SPEED
         # update horizontal position and clamp inside screen
         new_x = int(self.rect.x + (self.vx * game_speed))
         # clamp to screen bounds
-        new_x = max(0, min(new_x, SCREEN_WIDTH - self.width))
+        new_x = max(0, min(new_x, SCREEN_WIDTH - self.rect.width))
         self.rect.x = new_x
 
         # clamp to screen bounds
@@ -68,11 +78,13 @@ class Sheep(pygame.sprite.Sprite):
             self.rect.right = SCREEN_WIDTH
 
         # jump (W/up) - allow multi-jump, debounce
-        jump_pressed = keys[pygame.K_w] or keys[pygame.K_UP]
+        jump_pressed = controls.jump
+        self.last_jumped = False
         if jump_pressed and not self.prev_jump_pressed and self.jump_count < MAX_JUMPS:
             self.vy = SHEEP_JUMP_SPEED
             self.on_ground = False
             self.jump_count += 1
+            self.last_jumped = True
         self.prev_jump_pressed = jump_pressed
 
         # gravity
@@ -80,7 +92,7 @@ class Sheep(pygame.sprite.Sprite):
             self.vy += GRAVITY
         else:
             # balloon effect: float up and down
-            self.vy = math.sin(pygame.time.get_ticks() / 200) * 2
+            self.vy = math.sin(self.ticks * (1000 / TICK_RATE) / 200) * 2
         self.rect.y += int(self.vy)
 
         # ground clamp
@@ -93,7 +105,28 @@ class Sheep(pygame.sprite.Sprite):
 
         # animate
         self.anim_index = (self.anim_index + 1) % len(self.frames)
-        self.image = self.frames[self.anim_index]
+        self.image = self.frame(self.anim_index)
+        self.ticks += 1
+
+    def _frame_size(self):
+        if self.size_mod == 1.0:
+            return (self.width, self.height)
+        return (int(self.width * self.size_mod), int(self.height * self.size_mod))
+
+    def frame(self, index):
+        """Animation frame `index` at the current size_mod, scaled once and cached."""
+        if self.size_mod == 1.0:
+            return self.frames[index]
+        key = (index, self.size_mod)
+        surf = self._scaled.get(key)
+        if surf is None:
+            surf = pygame.transform.scale(self.frames[index], self._frame_size())
+            self._scaled[key] = surf
+            if len(self._scaled) > self.SCALED_FRAME_CACHE:
+                self._scaled.popitem(last=False)
+        else:
+            self._scaled.move_to_end(key)
+        return surf
 
     def eat(self):
         # could play animation/sound
@@ -0,0 +1,416 @@
+"""Simulation in its own process.
+
+With SIM_PROCESS on, Game hands the Simulation to a worker process that
+steps it at TICK_RATE on its own clock. After each batch of ticks the
+worker writes a snapshot of everything the renderer draws (sheep, entity
+rects and kinds, herd, score, effect) into the spare one of two buffers
+in shared memory and then points `latest` at it. The renderer copies the
+latest complete snapshot into a SnapshotView, which stands in for
+Game.sim. Snapshots are numbered by one counter across both buffers, and a
+buffer's number is odd while it is being written, so a copy that raced the
+writer is simply retried. Drawing
+and flip() then overlap the next ticks instead of following them.
+
+Input goes the other way through the same block: held keys plus running
+totals of shots and restarts, so nothing pressed between ticks is lost.
+SimEvents (for sounds) come back through a small ring.
+"""
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from config import *
+from simulation import Simulation, SimEvent, TickInput, PLAYER_START
+from sheep import Sheep
+from herd import SheepBatch
+from grass import Collectible
+from entities import EntityStore, KINDS, KIND_INDEX, COLLECTIBLE, OBSTACLE, WOLF, PROJECTILE
+from profiler import NULL_PROFILER
+from replay import Recording, save_session
+from telemetry import Telemetry
+
+MAX_ENTITIES = 1024   # entities past this many are not drawn
+MAX_HERD = 256
+MAX_PLAYERS = 3
+EVENT_RING = 256
+
+EVENT_TYPES = ('jump', 'shoot', 'pickup', 'effect', 'wolf_kill', 'death', 'herd_death')
+EVENT_KINDS = (None, 'obstacle', 'wolf') + tuple(KINDS)
+_EVENT_TYPE = {name: i for i, name in enumerate(EVENT_TYPES)}
+_EVENT_KIND = {name: i for i, name in enumerate(EVENT_KINDS)}
+
+# control words
+LATEST, STOP, PAUSED, READY, EVENTS, RESTARTS = range(6)
+INPUTS = 8  # then left, right, jump, shots total for each player
+CONTROL_SIZE = INPUTS + 4 * MAX_PLAYERS
+
+HEAD = np.dtype([
+    ('seq', '<i8'),
+    ('time', '<f8'),          # time.perf_counter() when published
+    ('tick', '<i8'),
+    ('score', '<i8'),
+    ('game_over', '<i8'),
+    ('death_tick', '<i8'),    # -1: alive
+    ('last_speed', '<f8'),
+    ('game_speed', '<f8'),
+    ('effect', '<i8'),        # index into KINDS, -1 for none
+    ('player', '<i8', (7,)),  # x, y, w, h, x and y before the last tick, animation frame
+    ('size_mod', '<f8'),
+    ('entities', '<i8'),
+    ('herd', '<i8'),
+], align=True)
+ENTITY = np.dtype([('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'), ('cat', 'i1'), ('kind', 'i1')], align=True)
+HERD = np.dtype([('x', '<i4'), ('y', '<i4'), ('size', '<i4'), ('prev_x', '<i4'), ('prev_y', '<i4'),
+                 ('anim', 'i1'), ('look', 'i1')], align=True)
+EVENT = np.dtype([('type', 'u1'), ('kind', 'u1'), ('points', '<i4')], align=True)
+BLOCK = np.dtype([
+    ('control', '<i8', (CONTROL_SIZE,)),
+    ('head', HEAD, (2,)),
+    ('entities', ENTITY, (2, MAX_ENTITIES)),
+    ('herd', HERD, (2, MAX_HERD)),
+    ('events', EVENT, (EVENT_RING,)),
+], align=True)
+
+
+class SharedBlock:
+    """NumPy views of the shared-memory block, on either side."""
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        block = np.ndarray((), dtype=BLOCK, buffer=shm.buf)
+        self.control = block['control']
+        self.head = block['head']
+        self.entities = block['entities']
+        self.herd = block['herd']
+        self.events = block['events']
+
+    @classmethod
+    def create(cls):
+        shm = shared_memory.SharedMemory(create=True, size=BLOCK.itemsize)
+        block = cls(shm, owner=True)
+        block.control[:] = 0
+        block.head['seq'] = 0
+        return block
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def close(self):
+        # drop the numpy views before closing the mapping
+        self.control = self.head = self.entities = self.herd = self.events = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# -- worker side -------------------------------------------------------------
+
+class Publisher:
+    """Writes snapshots and events of a Simulation into a SharedBlock."""
+    def __init__(self, block):
+        self.block = block
+        self.events = 0
+        # snapshots published so far; the buffer being written holds 2 * seq + 1
+        self.seq = 0
+
+    def publish(self, sim, prev_player):
+        block = self.block
+        b = 1 - int(block.control[LATEST])
+        head = block.head[b:b + 1]
+        head['seq'] = 2 * self.seq + 1
+        head['time'] = time.perf_counter()
+        head['tick'] = sim.tick
+        head['score'] = sim.score
+        head['game_over'] = sim.game_over
+        head['death_tick'] = -1 if sim.death_tick is None else sim.death_tick
+        head['last_speed'] = sim.last_speed
+        head['game_speed'] = sim.game_speed
+        head['effect'] = KIND_INDEX[sim.effect] if sim.effect else -1
+        player = sim.player
+        head['player'] = (*player.rect, *prev_player, player.anim_index)
+        head['size_mod'] = player.size_mod
+
+        out = block.entities[b]
+        store = sim.entities
+        if store is not None:
+            live = np.flatnonzero(store.alive[:store.n])
+            # EntityStore.draw order: by category, spawn order within one
+            order = live[np.argsort(store.cat[live], kind='stable')][:MAX_ENTITIES]
+            n = order.size
+            for name in ('x', 'y', 'w', 'h', 'cat', 'kind'):
+                out[name][:n] = getattr(store, name)[order]
+        else:
+            rows = [(*s.rect, cat, KIND_INDEX[s.kind] if cat == COLLECTIBLE else 0)
+                    for cat, group in ((COLLECTIBLE, sim.collectible_group), (OBSTACLE, sim.obstacle_group),
+                                       (WOLF, sim.wolf_group), (PROJECTILE, sim.projectile_group))
+                    for s in group][:MAX_ENTITIES]
+            n = len(rows)
+            if n:
+                out[:n] = np.array(rows, dtype=ENTITY)
+        head['entities'] = n
+
+        herd = sim.herd
+        live = np.flatnonzero(herd.alive[:herd.n])[:MAX_HERD]
+        m = live.size
+        rows = block.herd[b]
+        rows['x'][:m] = herd.x[live]
+        rows['y'][:m] = herd.y[live]
+        rows['size'][:m] = herd.w[live]
+        rows['prev_x'][:m] = herd.prev_x[live]
+        rows['prev_y'][:m] = herd.prev_y[live]
+        rows['anim'][:m] = herd.anim[live]
+        rows['look'][:m] = herd.look[live]
+        head['herd'] = m
+
+        self.seq += 1
+        head['seq'] = 2 * self.seq
+        block.control[LATEST] = b
+
+    def send_events(self, events):
+        ring = self.block.events
+        for e in events:
+            slot = ring[self.events % EVENT_RING]
+            slot['type'] = _EVENT_TYPE[e.type]
+            slot['kind'] = _EVENT_KIND.get(e.kind, 0)
+            slot['points'] = e.points
+            self.events += 1
+        # readers only look below this count, so it moves after the records are in place
+        self.block.control[EVENTS] = self.events
+
+
+def _run_worker(name, seed, entities, spawns, ghosts, players, record, telemetry):
+    """Worker process: step the Simulation at TICK_RATE until told to stop."""
+    block = SharedBlock.attach(name)
+    control = block.control
+    sim = Simulation(seed=seed, entities=entities, spawns=spawns)
+    for script in ghosts:
+        sim.add_ghost(*script)
+    for _ in range(players):
+        sim.add_player()
+    recording = Recording(sim.seed, entities, sim.spawns) if record else None
+    log = Telemetry() if telemetry else None
+    out = Publisher(block)
+    prev_player = sim.player.rect.topleft
+    out.publish(sim, prev_player)
+    control[READY] = 1
+
+    dt = 1.0 / TICK_RATE
+    shots = np.zeros(1 + players, dtype=np.int64)
+    restarts = 0
+    next_tick = time.perf_counter()
+    while not control[STOP]:
+        now = time.perf_counter()
+        if control[PAUSED]:
+            time.sleep(dt)
+            next_tick = time.perf_counter()
+            continue
+        if now < next_tick:
+            time.sleep(next_tick - now)
+            continue
+        ticks = int((now - next_tick) // dt) + 1
+        if ticks > MAX_CATCHUP_TICKS:
+            ticks = MAX_CATCHUP_TICKS
+            next_tick = now
+        next_tick += ticks * dt
+        for _ in range(ticks):
+            # snapshot the input words, then take what's new since the last tick
+            words = control[INPUTS:INPUTS + 4 * (1 + players)].reshape(-1, 4).copy()
+            new_shots = words[:, 3] - shots
+            shots = words[:, 3]
+            total = int(control[RESTARTS])
+            restart = total != restarts
+            restarts = total
+            inputs = [TickInput(left, right, jump, int(n)) for (left, right, jump, _), n in zip(words.tolist(), new_shots)]
+            inp = inputs[0]
+            inp.restart = restart
+            # a stopped game over only changes with input
+            if sim.game_over and not sim.last_speed and not restart and not new_shots.any():
+                continue
+            was_over = sim.game_over
+            prev_player = sim.player.rect.topleft
+            if recording is not None:
+                recording.append(inp)
+            events = sim.step(inp, inputs[1:])
+            if was_over and not sim.game_over:
+                prev_player = sim.player.rect.topleft
+            out.send_events(events)
+            if log is not None:
+                log.log(sim, events)
+        out.publish(sim, prev_player)
+
+    if recording is not None:
+        save_session(recording, sim)
+    if log is not None:
+        log.close()
+    block.close()
+
+
+# -- renderer side -----------------------------------------------------------
+
+class SnapshotView:
+    """The parts of a Simulation that Game reads, filled in from the latest snapshot."""
+    def __init__(self):
+        self.tick = 0
+        self.score = 0
+        self.game_over = False
+        self.death_tick = None
+        self.last_speed = 0.0
+        self.game_speed = INITIAL_GAME_SPEED
+        self.effect = None
+        self.effect_bg = None
+        # perf_counter time the snapshot was published
+        self.time = 0.0
+        # sheep position before the last tick
+        self.prev_player = None
+        self.player = Sheep(*PLAYER_START)
+        self.sheep_group = pygame.sprite.RenderUpdates(self.player)
+        # entities are always drawn from the store, whichever backend the worker uses
+        self.entities = EntityStore(capacity=MAX_ENTITIES)
+        self.collectible_group = pygame.sprite.RenderUpdates()
+        self.obstacle_group = pygame.sprite.RenderUpdates()
+        self.wolf_group = pygame.sprite.RenderUpdates()
+        self.projectile_group = pygame.sprite.RenderUpdates()
+        self.herd = SheepBatch(capacity=MAX_HERD)
+        self.profiler = NULL_PROFILER
+
+    def load(self, head, entities, herd):
+        """Take over one snapshot (copies of a buffer's head, entity and herd rows)."""
+        self.time = float(head['time'])
+        self.tick = int(head['tick'])
+        self.score = int(head['score'])
+        self.game_over = bool(head['game_over'])
+        self.death_tick = None if head['death_tick'] < 0 else int(head['death_tick'])
+        self.last_speed = float(head['last_speed'])
+        self.game_speed = float(head['game_speed'])
+        effect = int(head['effect'])
+        self.effect = KINDS[effect] if effect >= 0 else None
+        self.effect_bg = Collectible.BG_MAP.get(self.effect, None) if self.effect else None
+
+        x, y, w, h, px, py, anim = head['player'].tolist()
+        player = self.player
+        player.size_mod = float(head['size_mod'])
+        player.anim_index = anim
+        player.rect = pygame.Rect(x, y, w, h)
+        player.image = player.frame(anim)
+        self.prev_player = (px, py)
+
+        store = self.entities
+        n = len(entities)
+        for name in ('x', 'y', 'w', 'h', 'cat', 'kind'):
+            getattr(store, name)[:n] = entities[name]
+        store.alive[:n] = True
+        store.n = n
+
+        batch = self.herd
+        m = len(herd)
+        batch.x[:m] = herd['x']
+        batch.y[:m] = herd['y']
+        batch.w[:m] = herd['size']
+        batch.h[:m] = herd['size']
+        batch.prev_x[:m] = herd['prev_x']
+        batch.prev_y[:m] = herd['prev_y']
+        batch.anim[:m] = herd['anim']
+        batch.look[:m] = herd['look']
+        batch.alive[:m] = True
+        batch.n = m
+
+
+class Reader:
+    """Reads snapshots and events from a SharedBlock into a SnapshotView."""
+    def __init__(self, block):
+        self.block = block
+        self.view = SnapshotView()
+        self._seq = -1
+        self._events = 0
+
+    def sync(self):
+        """Load the latest complete snapshot into `view`; returns the SimEvents since the last sync."""
+        block = self.block
+        while True:
+            b = int(block.control[LATEST])
+            seq = int(block.head['seq'][b])
+            if seq == self._seq:
+                break
+            head = block.head[b].copy()
+            entities = block.entities[b][:head['entities']].copy()
+            herd = block.herd[b][:head['herd']].copy()
+            # the writer never touches the latest buffer, but may have lapped us during the copy
+            if seq % 2 == 0 and int(block.head['seq'][b]) == seq:
+                self.view.load(head, entities, herd)
+                self._seq = seq
+                break
+        total = int(block.control[EVENTS])
+        start = max(self._events, total - EVENT_RING)
+        events = []
+        ring = block.events
+        for i in range(start, total):
+            e = ring[i % EVENT_RING]
+            events.append(SimEvent(EVENT_TYPES[e['type']], EVENT_KINDS[e['kind']], int(e['points'])))
+        self._events = total
+        return events
+
+
+class SimProcess:
+    """Starts the worker and talks to it; `view` always holds the latest snapshot read."""
+    def __init__(self, seed=None, entities='sprites', spawns=SPAWN_MODE, ghosts=(), players=0,
+                 record=False, telemetry=False, timeout=10.0):
+        if players + 1 > MAX_PLAYERS:
+            raise ValueError(f"at most {MAX_PLAYERS} local players")
+        self.block = SharedBlock.create()
+        self.block.control[PAUSED] = 1
+        self.reader = Reader(self.block)
+        self.view = self.reader.view
+        self.players = players
+        self._shots = [0] * (1 + players)
+        self._restarts = 0
+        ctx = mp.get_context()
+        self.process = ctx.Process(
+            target=_run_worker, name='simulation', daemon=True,
+            args=(self.block.shm.name, seed, entities, spawns, list(ghosts), players, record, telemetry))
+        self.process.start()
+        deadline = time.perf_counter() + timeout
+        while not self.block.control[READY]:
+            if not self.process.is_alive() or time.perf_counter() > deadline:
+                self.close()
+                raise RuntimeError("simulation process failed to start")
+            time.sleep(0.001)
+        self.sync()
+
+    def pause(self, paused):
+        self.block.control[PAUSED] = paused
+
+    def send(self, inp, players=()):
+        """Hand the worker the controls for its next ticks."""
+        control = self.block.control
+        for i, c in enumerate((inp, *players)):
+            self._shots[i] += c.shots
+            base = INPUTS + 4 * i
+            control[base:base + 4] = (c.left, c.right, c.jump, self._shots[i])
+        if inp.restart:
+            self._restarts += 1
+            control[RESTARTS] = self._restarts
+
+    def sync(self):
+        """Load the latest complete snapshot into `view`; returns the SimEvents since the last sync."""
+        return self.reader.sync()
+
+    def alpha(self):
+        """How far real time is past the latest snapshot, in ticks (at most 1).
+
+        perf_counter is a system-wide clock, so the worker's timestamps compare with ours.
+        """
+        return min(max((time.perf_counter() - self.view.time) * TICK_RATE, 0.0), 1.0)
+
+    def close(self):
+        """Stop the worker (it saves its recording and telemetry) and free the shared memory."""
+        if self.block is None:
+            return
+        self.block.control[STOP] = 1
+        self.process.join(5.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.block.close()
+        self.block = None
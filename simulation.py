@@ -0,0 +1,383 @@
+"""Headless game simulation.
+
+Holds the world state (sheep, entity groups, spawner, score, effects) and
+advances it one tick at a time from an explicit TickInput. Nothing in here
+reads the keyboard, draws, or plays sounds, so it runs without a display or
+an audio device; Game wraps it and turns the returned events into sounds.
+"""
+import random
+from collections import namedtuple
+import numpy as np
+import pygame
+from config import *
+from sheep import Sheep
+from herd import SheepBatch
+from grass import Collectible, Spawner, Projectile
+from profiler import NULL_PROFILER
+import spatial
+from entities import EntityStore, ArraySpawner, COLLECTIBLE, OBSTACLE, WOLF, KINDS
+
+PLAYER_START = (100, SCREEN_HEIGHT - TILE_SIZE - SHEEP_SIZE)
+
+# Something that happened during a tick.
+#   type:   'jump', 'shoot', 'pickup', 'effect', 'wolf_kill' or 'death'
+#   kind:   collectible kind for pickup/effect, cause ('obstacle'/'wolf') for death
+#   points: score added by this event
+SimEvent = namedtuple('SimEvent', 'type kind points')
+
+
+class TickInput:
+    """Controls for a single simulation tick."""
+    __slots__ = ('left', 'right', 'jump', 'shots', 'restart')
+
+    def __init__(self, left=False, right=False, jump=False, shots=0, restart=False):
+        self.left = bool(left)
+        self.right = bool(right)
+        self.jump = bool(jump)
+        self.shots = shots
+        self.restart = bool(restart)
+
+    @classmethod
+    def from_keys(cls, keys, shots=0, restart=False, scheme=None):
+        """Build from a pygame.key.get_pressed() snapshot.
+
+        `scheme` picks one set of KEY_SCHEMES; by default WASD and the arrows both work.
+        """
+        if scheme is not None:
+            left, right, jump = KEY_SCHEMES[scheme]
+            return cls(left=keys[left], right=keys[right], jump=keys[jump], shots=shots, restart=restart)
+        return cls(
+            left=keys[pygame.K_a] or keys[pygame.K_LEFT],
+            right=keys[pygame.K_d] or keys[pygame.K_RIGHT],
+            jump=keys[pygame.K_w] or keys[pygame.K_UP],
+            shots=shots,
+            restart=restart,
+        )
+
+
+# (left, right, jump) keys of each local player
+KEY_SCHEMES = {
+    'wasd': (pygame.K_a, pygame.K_d, pygame.K_w),
+    'arrows': (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP),
+    'ijl': (pygame.K_j, pygame.K_l, pygame.K_i),
+}
+
+
+class Simulation:
+    """One game world.
+
+    `entities` picks the backend for collectibles, obstacles, wolves and
+    projectiles: 'sprites' keeps them as sprites in the groups below,
+    'numpy' keeps them in an entities.EntityStore (the groups stay empty).
+    `spawns` is 'schedule' (precomputed spawn timeline) or 'rolls' (per-tick rolls).
+    """
+    def __init__(self, seed=None, entities='sprites', spawns=SPAWN_MODE):
+        # always run from a known seed so any session can be recorded and replayed
+        if seed is None:
+            seed = random.randrange(1 << 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # groups (RenderUpdates so Game can draw them with dirty rects)
+        self.sheep_group = pygame.sprite.RenderUpdates()
+        self.collectible_group = pygame.sprite.RenderUpdates()
+        self.obstacle_group = pygame.sprite.RenderUpdates()
+        self.wolf_group = pygame.sprite.RenderUpdates()
+        self.projectile_group = pygame.sprite.RenderUpdates()
+
+        # create player
+        self.player = Sheep(*PLAYER_START)
+        self.sheep_group.add(self.player)
+        # ghosts and extra local players, stepped together (see add_ghost/add_player)
+        self.herd = SheepBatch()
+
+        if spawns not in ('schedule', 'rolls'):
+            raise ValueError(f"unknown spawn mode: {spawns!r}")
+        self.spawns = spawns
+        scheduled = spawns == 'schedule'
+        if entities == 'numpy':
+            self.entities = EntityStore()
+            self.spawner = ArraySpawner(self.entities, rng=self.rng, schedule=scheduled)
+        elif entities == 'sprites':
+            self.entities = None
+            self.spawner = Spawner(self.collectible_group, self.obstacle_group, self.wolf_group,
+                                   rng=self.rng, schedule=scheduled)
+        else:
+            raise ValueError(f"unknown entity backend: {entities!r}")
+
+        self.tick = 0
+        self.death_tick = None
+        self.game_over = False
+        self.game_speed = INITIAL_GAME_SPEED
+        self.speed_increment = SPEED_INCREMENT
+        # game speed the world moved at during the last step (0 while it was stopped)
+        self.last_speed = 0.0
+        self.score = 0
+        # effect timers
+        self.effect = None
+        self.effect_timer = 0
+        self.effect_bg = None
+        # wolf x projectile counts from which the sort-and-sweep broad phase is used
+        self.broad_phase_pairs = BROAD_PHASE_MIN_PAIRS
+        self._sweep = spatial.SweepIndex()
+        # benchmarks/balance runs: report deaths as events but keep playing
+        self.invulnerable = False
+        # phase timings; swap in a profiler.FrameProfiler to measure
+        self.profiler = NULL_PROFILER
+
+    def reset(self):
+        self.game_over = False
+        self.death_tick = None
+        self.score = 0
+        self.game_speed = INITIAL_GAME_SPEED
+        self.collectible_group.empty()
+        self.obstacle_group.empty()
+        if self.entities is not None:
+            self.entities.clear(COLLECTIBLE, OBSTACLE)
+        self.player.rect.topleft = PLAYER_START
+        self.player.vx = 0
+        self.player.vy = 0
+        self.player.size_mod = 1.0
+        self.effect = None
+        self.effect_timer = 0
+        self.herd.reset(*PLAYER_START)
+
+    def add_ghost(self, left, right, jump):
+        """Add a ghost sheep following recorded controls (replay.Recording.controls()); returns its herd row.
+
+        Ghosts run into the same obstacles and wolves as the player but never
+        pick anything up or change the world. They only race the first run:
+        reset() drops them, as the world after a restart is a different one.
+        """
+        return self.herd.add(*PLAYER_START, script=(left, right, jump))
+
+    def add_player(self):
+        """Add a local player; step() then takes one TickInput per added player. Returns its herd row.
+
+        Extra players share the score and drop out when caught; the run ends
+        when the first player is.
+        """
+        return self.herd.add(*PLAYER_START, look=len(self.herd.players()) + 1)
+
+    def shoot(self, rect=None):
+        if rect is None:
+            rect = self.player.rect
+        px = rect.right
+        py = rect.centery
+        if self.entities is not None:
+            self.entities.add_projectile(px, py)
+        else:
+            self.projectile_group.add(Projectile.spawn(px, py))
+
+    def step(self, inp, players=()):
+        """Advance the world by one tick and return the list of SimEvents it produced.
+
+        `players` has one TickInput for each player added with add_player().
+        """
+        events = []
+        self.tick += 1
+        self.last_speed = 0.0
+        if inp.restart and self.game_over:
+            self.reset()
+        for _ in range(inp.shots):
+            self.shoot()
+            events.append(SimEvent('shoot', None, 0))
+        if players:
+            rows = self.herd.players()
+            for row, controls in zip(rows, players):
+                if controls.shots and self.herd.alive[row]:
+                    rect = self.herd.rect(row)
+                    for _ in range(controls.shots):
+                        self.shoot(rect)
+                        events.append(SimEvent('shoot', None, 0))
+        if self.game_over:
+            return events
+        self.last_speed = self.game_speed
+
+        # effect timer
+        if self.effect_timer > 0:
+            self.effect_timer -= 1
+            if self.effect_timer == 0:
+                self._clear_effect()
+
+        prof = self.profiler
+        with prof.phase('sheep'):
+            self.player.update(inp, self.game_speed)
+        if self.player.last_jumped:
+            events.append(SimEvent('jump', None, 0))
+        if self.herd.n:
+            with prof.phase('herd'):
+                jumped = self.herd.update(self.game_speed, players)
+            for _ in range(int(np.count_nonzero(jumped & ~self.herd.scripted[:self.herd.n]))):
+                events.append(SimEvent('jump', None, 0))
+        # spawn
+        with prof.phase('spawn'):
+            self.spawner.maybe_spawn(self.game_speed)
+        if self.entities is not None:
+            with prof.phase('entities'):
+                self.entities.step(self.game_speed)
+            self._collide_arrays(events)
+            if self.herd.n:
+                with prof.phase('collide herd'):
+                    self._collide_herd(events)
+            self.entities.compact()
+        else:
+            # update groups
+            with prof.phase('update collectibles'):
+                self.collectible_group.update(self.game_speed)
+            with prof.phase('update obstacles'):
+                self.obstacle_group.update(self.game_speed)
+            with prof.phase('update wolves'):
+                self.wolf_group.update(self.game_speed)
+            with prof.phase('update projectiles'):
+                self.projectile_group.update(self.game_speed)
+            self._collide(events)
+            if self.herd.n:
+                with prof.phase('collide herd'):
+                    self._collide_herd(events)
+
+        # increase speed
+        self.game_speed += self.speed_increment
+        return events
+
+    def _collide(self, events):
+        prof = self.profiler
+        rect = self.player.rect
+        # collisions with collectibles
+        with prof.phase('collide collectibles'):
+            # Rect.collidelistall does the player-vs-group scan in C, in group order
+            group = self.collectible_group.sprites()
+            hits = [group[i] for i in rect.collidelistall([c.rect for c in group])]
+            for c in hits:
+                c.kill()
+        for c in hits:
+            self._pickup(c.kind, c.value, events)
+        # projectile-wolf collision
+        with prof.phase('collide projectiles'):
+            wolves = self.wolf_group
+            shots = self.projectile_group
+            if len(wolves) * len(shots) >= self.broad_phase_pairs:
+                # many-to-many: only test pairs whose x-extents can overlap
+                shot = spatial.groupcollide(wolves, shots, True, True, self._sweep.build(shots))
+            else:
+                shot = spatial.groupcollide_scan(wolves, shots, True, True)
+        for wolf in shot:
+            self._wolf_killed(events)
+        # collisions with obstacles
+        with prof.phase('collide obstacles'):
+            crashed = rect.collidelist([o.rect for o in self.obstacle_group]) != -1
+        if crashed:
+            self._die('obstacle', events)
+        # wolf-player collision (game over)
+        with prof.phase('collide wolves'):
+            caught = rect.collidelist([w.rect for w in self.wolf_group]) != -1
+        if caught:
+            self._die('wolf', events)
+
+    def _collide_arrays(self, events):
+        """Same rules as _collide, run against the EntityStore."""
+        prof = self.profiler
+        store = self.entities
+        rect = self.player.rect
+        with prof.phase('collide collectibles'):
+            hits = store.overlapping(rect, COLLECTIBLE)
+            store.alive[hits] = False
+        for i in hits:
+            self._pickup(KINDS[store.kind[i]], int(store.value[i]), events)
+        with prof.phase('collide projectiles'):
+            shot = store.collide_wolves_projectiles()
+        for _ in range(shot):
+            self._wolf_killed(events)
+        with prof.phase('collide obstacles'):
+            crashed = store.overlapping(rect, OBSTACLE).size
+        if crashed:
+            self._die('obstacle', events)
+        with prof.phase('collide wolves'):
+            caught = store.overlapping(rect, WOLF).size
+        if caught:
+            self._die('wolf', events)
+
+    def _world(self, cat):
+        """Live entities of `cat` as (handles, x, y, w, h) arrays; handles are sprites or store indices."""
+        store = self.entities
+        if store is not None:
+            n = store.n
+            idx = np.flatnonzero(store.alive[:n] & (store.cat[:n] == cat))
+            return idx, store.x[idx], store.y[idx], store.w[idx], store.h[idx]
+        group = {COLLECTIBLE: self.collectible_group, OBSTACLE: self.obstacle_group, WOLF: self.wolf_group}[cat]
+        sprites = group.sprites()
+        rects = np.array([tuple(s.rect) for s in sprites], dtype=np.int64).reshape(-1, 4)
+        return sprites, rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+
+    def _collide_herd(self, events):
+        """Resolve every herd sheep against the world in one pass per category."""
+        herd = self.herd
+        live = np.flatnonzero(herd.alive[:herd.n])
+        if not live.size:
+            return
+        # obstacles and wolves knock sheep out of the race
+        for cat, cause in ((OBSTACLE, 'obstacle'), (WOLF, 'wolf')):
+            _, x, y, w, h = self._world(cat)
+            if not x.size:
+                continue
+            rows, hit = herd.overlaps(x, y, w, h, live)
+            for row in rows[hit.any(axis=1)]:
+                if herd.scripted[row]:
+                    herd.alive[row] = False
+                else:
+                    if not self.invulnerable:
+                        herd.alive[row] = False
+                    events.append(SimEvent('herd_death', cause, 0))
+        # players (not ghosts) still in the race eat what they touch, lowest row first
+        players = live[~herd.scripted[live] & herd.alive[live]]
+        if not players.size:
+            return
+        handles, x, y, w, h = self._world(COLLECTIBLE)
+        if not x.size:
+            return
+        rows, hit = herd.overlaps(x, y, w, h, players)
+        for col in np.flatnonzero(hit.any(axis=0)):
+            row = rows[hit[:, col].argmax()]
+            if self.entities is not None:
+                i = handles[col]
+                self.entities.alive[i] = False
+                kind, value = KINDS[self.entities.kind[i]], int(self.entities.value[i])
+            else:
+                c = handles[col]
+                c.kill()
+                kind, value = c.kind, c.value
+            before = self.score
+            self._pickup(kind, value, events)
+            herd.score[row] += self.score - before
+
+    def _pickup(self, kind, value, events):
+        # double score for pink/blue mushrooms
+        if kind in ('mushroom_pink', 'mushroom_blue'):
+            points = value * 2
+        else:
+            points = value
+        self.score += points
+        events.append(SimEvent('pickup', kind, points))
+        # handle colored mushroom effects
+        if kind.startswith('mushroom'):
+            self.effect = kind
+            self.effect_timer = TICK_RATE * 3
+            self.effect_bg = Collectible.BG_MAP.get(kind, None)
+            events.append(SimEvent('effect', kind, 0))
+
+    def _wolf_killed(self, events):
+        # reward points for defeating a wolf
+        self.score += 5
+        events.append(SimEvent('wolf_kill', None, 5))
+
+    def _die(self, cause, events):
+        if self.invulnerable:
+            events.append(SimEvent('death', cause, 0))
+        elif not self.game_over:
+            self.game_over = True
+            self.death_tick = self.tick
+            events.append(SimEvent('death', cause, 0))
+
+    def _clear_effect(self):
+        self.effect = None
+        self.effect_bg = None
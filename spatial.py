@@ -0,0 +1,83 @@
+"""Broad phase for sprite-vs-sprite-group collisions.
+
+Everything in the game lives in one horizontal band above the ground, so
+the axis that separates entities is x: a sweep-and-prune index sorts a
+group by rect.left once per tick and a query only tests the sprites whose
+x-extent can overlap the query rect. Candidates come back in group order
+and the narrow phase is the same Rect.colliderect test pygame uses, so
+results (including which sprites are hit, and in what order) match
+pygame.sprite.groupcollide exactly.
+"""
+from bisect import bisect_left, bisect_right
+import pygame
+
+EMPTY_RECT = pygame.Rect(0, 0, 0, 0)
+
+
+class SweepIndex:
+    def __init__(self):
+        self.sprites = []
+        self.order = []
+        self.lefts = []
+        self.max_width = 0
+
+    def build(self, sprites):
+        """Index `sprites` (in group order); returns self for chaining."""
+        self.sprites = sprites = list(sprites)
+        self.order = order = sorted(range(len(sprites)), key=lambda i: sprites[i].rect.left)
+        self.lefts = [sprites[i].rect.left for i in order]
+        self.max_width = max((s.rect.width for s in sprites), default=0)
+        return self
+
+    def candidates(self, rect):
+        """Indexed sprites whose x-extent may overlap `rect`, in group order."""
+        # a sprite can only overlap if rect.left - max_width < its left < rect.right
+        lo = bisect_right(self.lefts, rect.left - self.max_width)
+        hi = bisect_left(self.lefts, rect.right)
+        if lo >= hi:
+            return []
+        sprites = self.sprites
+        return [sprites[i] for i in sorted(self.order[lo:hi])]
+
+    def collide(self, rect):
+        """Indexed sprites whose rect overlaps `rect`, in group order."""
+        return [s for s in self.candidates(rect) if s.rect.colliderect(rect)]
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, index):
+    """pygame.sprite.groupcollide with `index` built from groupb this tick."""
+    crashed = {}
+    for a in groupa.sprites():
+        # sprites killed by an earlier pair are no longer in groupb
+        hits = [b for b in index.collide(a.rect) if groupb.has(b)]
+        if hits:
+            if dokillb:
+                for b in hits:
+                    b.kill()
+            crashed[a] = hits
+            if dokilla:
+                a.kill()
+    return crashed
+
+
+def groupcollide_scan(groupa, groupb, dokilla, dokillb):
+    """pygame.sprite.groupcollide with the per-sprite scan done by Rect.collidelistall in C.
+
+    Cheaper than building an index while the groups are small.
+    """
+    sprites = groupb.sprites()
+    rects = [s.rect for s in sprites]
+    crashed = {}
+    for a in groupa.sprites():
+        idx = a.rect.collidelistall(rects)
+        if idx:
+            hits = [sprites[i] for i in idx]
+            if dokillb:
+                for i in idx:
+                    sprites[i].kill()
+                    # an empty rect never collides, so killed sprites drop out of later scans
+                    rects[i] = EMPTY_RECT
+            crashed[a] = hits
+            if dokilla:
+                a.kill()
+    return crashed
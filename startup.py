@@ -0,0 +1,72 @@
+"""Startup timing.
+
+main.py and Game wrap each import and init step in step(), on whichever
+thread runs it, and mark() milestones ('first frame', 'ready'). report()
+then breaks the time to the first frame, and to everything being loaded,
+down by step. Times count from the first import of this module, which is
+the first thing main.py does, so they leave out interpreter start-up.
+Only the standard library is used here, so importing it costs nothing.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from config import STARTUP_BUDGET_MS
+
+_origin = time.perf_counter()
+_lock = threading.Lock()
+# (name, thread, start, end), seconds since _origin, in completion order
+_steps = []
+# milestone -> seconds since _origin
+_marks = {}
+
+
+@contextmanager
+def step(name):
+    """Time the body as one startup step."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        with _lock:
+            _steps.append((name, threading.current_thread().name, start - _origin, end - _origin))
+
+
+def mark(name):
+    """Note that milestone `name` was reached now (the first time only)."""
+    with _lock:
+        _marks.setdefault(name, time.perf_counter() - _origin)
+
+
+def report(budget_ms=STARTUP_BUDGET_MS):
+    """Steps and milestones so far as a dict (milliseconds)."""
+    with _lock:
+        steps = sorted(_steps, key=lambda s: s[2])
+        marks = dict(_marks)
+    first = marks.get('first frame')
+    return {
+        'steps': [{'name': name, 'thread': thread, 'start_ms': round(start * 1000, 2),
+                   'ms': round((end - start) * 1000, 2)} for name, thread, start, end in steps],
+        'marks': {name: round(t * 1000, 2) for name, t in marks.items()},
+        'budget_ms': budget_ms,
+        'over_budget': first is not None and first * 1000 > budget_ms,
+    }
+
+
+def format_report(rep):
+    lines = [f"{'startup step':<24}{'thread':<12}{'at ms':>9}{'took ms':>9}"]
+    for s in rep['steps']:
+        lines.append(f"{s['name']:<24}{s['thread']:<12}{s['start_ms']:>9.1f}{s['ms']:>9.1f}")
+    for name, ms in sorted(rep['marks'].items(), key=lambda m: m[1]):
+        lines.append(f"{name + ':':<36}{ms:>9.1f}")
+    first = rep['marks'].get('first frame')
+    if first is not None:
+        verdict = 'OVER BUDGET' if rep['over_budget'] else 'within budget'
+        lines.append(f"first frame {verdict} ({first:.0f} / {rep['budget_ms']} ms)")
+    return '\n'.join(lines)
+
+
+def save_report(path, rep):
+    with open(path, 'w') as f:
+        json.dump(rep, f, indent=1)
@@ -0,0 +1,177 @@
+"""Gameplay telemetry.
+
+Telemetry.log() runs on the game thread once per tick and only appends
+small tuples to a deque. A background thread turns whatever has queued up
+into fixed-size binary records (RECORD_DTYPE) every flush interval and
+appends them to the current log file, starting a new file past a size
+limit and deleting the oldest ones past a count limit. load() reads the
+logs back as one NumPy structured array.
+
+    import telemetry
+    rec = telemetry.load('telemetry')
+    deaths = rec[rec['type'] == telemetry.TYPES.index('death')]
+"""
+import glob
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import *
+from entities import KINDS
+
+MAGIC = b'SHEEPTEL'
+VERSION = 2
+
+# record types; 'speed' is a periodic game_speed sample, 'start' a new session
+TYPES = ('start', 'pickup', 'effect', 'wolf_kill', 'death', 'speed')
+# record['kind']: the collectible kind for pickups/effects, the cause for deaths
+CAUSES = ('obstacle', 'wolf')
+NO_KIND = 255
+
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),      # wall clock, seconds since the epoch
+    ('run', '<u4'),       # when the game was launched (epoch seconds)
+    ('session', '<u4'),   # counts up from 0 at every start and restart within a run
+    ('tick', '<u4'),
+    ('type', 'u1'),
+    ('kind', 'u1'),
+    ('points', '<i2'),
+    ('score', '<i4'),
+    ('speed', '<f4'),
+])
+HEADER_SIZE = len(MAGIC) + 8
+
+_TYPE = {name: i for i, name in enumerate(TYPES)}
+_KIND = {name: i for i, name in enumerate(KINDS)}
+_CAUSE = {name: i for i, name in enumerate(CAUSES)}
+
+
+class Telemetry:
+    def __init__(self, directory=TELEMETRY_DIR, flush_seconds=TELEMETRY_FLUSH_SECONDS,
+                 file_bytes=TELEMETRY_FILE_BYTES, max_files=TELEMETRY_FILES, speed_every=TELEMETRY_SPEED_EVERY):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.file_bytes = file_bytes
+        self.max_files = max_files
+        self.speed_every = speed_every
+        self.run_id = int(time.time())
+        self.session = 0
+        self._queue = deque()
+        self._was_over = False
+        self._started = False
+        self._file = None
+        self._file_index = 0
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        # the pid keeps writers started in the same second apart
+        self._prefix = os.path.join(directory, time.strftime('telemetry-%Y%m%d-%H%M%S') + f'-{os.getpid()}')
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def log(self, sim, events):
+        """Queue records for one simulation tick and the SimEvents it produced."""
+        now = time.time()
+        tick = sim.tick
+        put = self._queue.append
+        if not self._started or (self._was_over and not sim.game_over):
+            if self._started:
+                self.session += 1
+            self._started = True
+            put((now, self.run_id, self.session, tick, _TYPE['start'], NO_KIND, 0, sim.score, sim.game_speed))
+        self._was_over = sim.game_over
+        for e in events:
+            code = _TYPE.get(e.type)
+            if code is None:
+                continue
+            if e.type == 'death':
+                kind = _CAUSE.get(e.kind, NO_KIND)
+            else:
+                kind = _KIND.get(e.kind, NO_KIND)
+            put((now, self.run_id, self.session, tick, code, kind, e.points, sim.score, sim.game_speed))
+        if tick % self.speed_every == 0 and not sim.game_over:
+            put((now, self.run_id, self.session, tick, _TYPE['speed'], NO_KIND, 0, sim.score, sim.game_speed))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Write everything queued so far (called from the background thread)."""
+        queued = self._queue
+        n = len(queued)
+        if not n:
+            return
+        records = np.array([queued.popleft() for _ in range(n)], dtype=RECORD_DTYPE)
+        f = self._current_file()
+        f.write(records.tobytes())
+        f.flush()
+
+    def _current_file(self):
+        if self._file is not None and self._file.tell() < self.file_bytes:
+            return self._file
+        if self._file is not None:
+            self._file.close()
+        # never write over another log, even one from a writer in this process
+        while True:
+            path = f"{self._prefix}-{self._file_index:03d}.bin"
+            self._file_index += 1
+            try:
+                self._file = open(path, 'xb')
+                break
+            except FileExistsError:
+                continue
+        self._file.write(MAGIC + np.array([VERSION, RECORD_DTYPE.itemsize], dtype='<u4').tobytes())
+        # keep only the newest max_files logs
+        logs = sorted(glob.glob(os.path.join(self.directory, 'telemetry-*.bin')))
+        for old in logs[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return self._file
+
+    def close(self):
+        """Flush what is queued and stop the writer thread."""
+        self._stop.set()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read(path):
+    """Records of one log file as a RECORD_DTYPE array.
+
+    Raises ValueError for a file that is not a current telemetry log. A
+    file cut short before its header was written holds no records.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE and MAGIC.startswith(header[:len(MAGIC)]):
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path}: not a version {VERSION} telemetry log")
+    version, itemsize = np.frombuffer(header[len(MAGIC):], dtype='<u4')
+    if header[:len(MAGIC)] != MAGIC or version != VERSION or itemsize != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: not a version {VERSION} telemetry log")
+    data = np.fromfile(path, dtype=np.uint8, offset=HEADER_SIZE)
+    # a record cut short by a crash mid-write is dropped
+    usable = data.size - data.size % RECORD_DTYPE.itemsize
+    return data[:usable].view(RECORD_DTYPE)
+
+
+def load(directory=TELEMETRY_DIR):
+    """Every log in `directory`, oldest first, as one RECORD_DTYPE array.
+
+    Files read() rejects (other versions, other formats) are skipped.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, 'telemetry-*.bin')))
+    parts = [np.zeros(0, dtype=RECORD_DTYPE)]
+    for p in paths:
+        try:
+            parts.append(read(p))
+        except ValueError:
+            continue
+    return np.concatenate(parts)
@@ -0,0 +1,19 @@
+import random
+from simulation import Simulation, TickInput
+
+
+def _play(entities, seed, ticks=3000):
+    sim = Simulation(seed=seed, entities=entities)
+    rng = random.Random(seed)
+    log = []
+    for _ in range(ticks):
+        inp = TickInput(left=rng.random() < 0.3, right=rng.random() < 0.5, jump=rng.random() < 0.1,
+                        shots=int(rng.random() < 0.2), restart=rng.random() < 0.02)
+        events = sim.step(inp)
+        log.append((events, sim.score, sim.death_tick, sim.player.rect.topleft))
+    return log
+
+
+def test_numpy_backend_matches_sprites():
+    for seed in range(3):
+        assert _play('numpy', seed) == _play('sprites', seed)
@@ -0,0 +1,16 @@
+from simulation import Simulation, TickInput
+
+
+def test_restart_drops_ghosts_and_keeps_players():
+    sim = Simulation(seed=4)
+    sim.add_ghost([False] * 500, [True] * 500, [False] * 500)
+    sim.add_player()
+    herd = sim.herd
+    for _ in range(10):
+        sim.step(TickInput(), [TickInput()])
+    assert herd.alive[:2].all()
+    sim.reset()
+    assert list(herd.alive[:2]) == [False, True]
+    for _ in range(10):
+        sim.step(TickInput(), [TickInput()])
+    assert list(herd.alive[:2]) == [False, True]
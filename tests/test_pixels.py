@@ -0,0 +1,18 @@
+import numpy as np
+import pygame
+import pixels
+
+
+def test_capture_reads_and_unlocks():
+    surface = pygame.Surface((40, 30))
+    surface.fill((10, 200, 30))
+    obs = pixels.PixelObserver((40, 30), factor=2, grayscale=True, stack=2)
+    frame = obs.capture(surface)
+    assert not surface.get_locked()
+    assert frame.shape == (15, 20)
+    assert np.all(frame == (77 * 10 + 150 * 200 + 29 * 30) >> 8)
+    with pixels.pixel_view(surface) as view:
+        assert surface.get_locked()
+        assert tuple(view[0, 0]) == (10, 200, 30)
+    del view
+    assert not surface.get_locked()
@@ -0,0 +1,48 @@
+import inspect
+import os
+import random
+import pytest
+import game
+import replay
+from simulation import Simulation, TickInput
+
+
+def test_round_trip(tmp_path):
+    sim = Simulation(seed=5)
+    rec = replay.Recording(sim.seed, 'sprites', sim.spawns)
+    rng = random.Random(5)
+    events = []
+    for _ in range(3000):
+        inp = TickInput(left=rng.random() < 0.3, right=rng.random() < 0.5, jump=rng.random() < 0.1,
+                        shots=rng.randrange(replay.MAX_SHOTS + 1) if rng.random() < 0.1 else 0,
+                        restart=rng.random() < 0.01)
+        rec.append(inp)
+        events.append(sim.step(inp))
+    path = replay.save_session(rec, sim, str(tmp_path))
+    loaded = replay.Recording.load(path)
+    assert (loaded.seed, loaded.score, loaded.death_tick) == (sim.seed, sim.score, sim.death_tick)
+    again = Simulation(seed=loaded.seed, entities=loaded.entities, spawns=loaded.spawns)
+    assert [again.step(inp) for inp in loaded.inputs()] == events
+    assert replay.verify(loaded, again) == []
+    assert replay.verify(loaded, replay.replay(loaded)) == []
+
+
+def test_too_many_shots():
+    rec = replay.Recording(0)
+    with pytest.raises(ValueError):
+        rec.append(TickInput(shots=replay.MAX_SHOTS + 1))
+
+
+def test_watch_records_nothing(tmp_path, monkeypatch):
+    # as if RECORD_SESSIONS and TELEMETRY were switched on in config.py
+    init = game.Game.__init__
+    names = list(inspect.signature(init).parameters)[-len(init.__defaults__):]
+    defaults = dict(zip(names, init.__defaults__), record=True, telemetry=True)
+    monkeypatch.setattr(init, '__defaults__', tuple(defaults.values()))
+    monkeypatch.chdir(tmp_path)
+    rec = replay.Recording(3)
+    for tick in range(20):
+        rec.append(TickInput(right=True, jump=tick == 5))
+    sim = replay.watch(rec)
+    assert sim.tick == 20
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,10 @@
+import rollouts
+
+
+def test_rollouts_stream_every_step():
+    stats = rollouts.StepStats()
+    results = rollouts.run_rollouts([{}, {'OBSTACLE_SPAWN_RATE': 0.05}], 3, max_ticks=400,
+                                    workers=2, ring_capacity=256, on_steps=stats)
+    assert [r['session'] for r in results] == list(range(6))
+    assert stats.steps == sum(r['ticks'] for r in results)
+    assert all(r['params'] == {} for r in results[:3])
@@ -0,0 +1,23 @@
+from simulation import Simulation, TickInput
+from simproc import SharedBlock, Publisher, Reader
+
+
+def test_reader_picks_up_every_snapshot():
+    block = SharedBlock.create()
+    try:
+        out = Publisher(block)
+        reader = Reader(block)
+        sim = Simulation(seed=1)
+        for i in range(50):
+            events = sim.step(TickInput(right=i % 20 < 10, jump=i % 15 == 0, shots=i % 7 == 0))
+            out.send_events(events)
+            out.publish(sim, sim.player.rect.topleft)
+            assert reader.sync() == events
+            assert reader.view.tick == sim.tick
+            assert reader.view.score == sim.score
+            assert tuple(reader.view.player.rect) == tuple(sim.player.rect)
+        # nothing new published: nothing new read
+        assert reader.sync() == []
+        assert reader.view.tick == sim.tick
+    finally:
+        block.close()
@@ -0,0 +1,23 @@
+import random
+from simulation import Simulation, TickInput
+
+
+def _play(broad_phase_pairs, seed, ticks=2000):
+    sim = Simulation(seed=seed, spawns='rolls')
+    sim.spawner.wolf_rate = 0.05
+    sim.invulnerable = True
+    sim.broad_phase_pairs = broad_phase_pairs
+    rng = random.Random(seed)
+    log = []
+    for _ in range(ticks):
+        events = sim.step(TickInput(jump=rng.random() < 0.1, shots=rng.randrange(4)))
+        log.append((events, sim.score))
+    return log
+
+
+def test_sweep_matches_scan():
+    """The SweepIndex broad phase, forced on for every tick, gives the same events as the pairwise scan."""
+    for seed in range(3):
+        swept = _play(0, seed)
+        assert swept == _play(1 << 62, seed)
+        assert any(e.type == 'wolf_kill' for events, _ in swept for e in events)
@@ -0,0 +1,50 @@
+import numpy as np
+import telemetry
+from simulation import Simulation, TickInput
+
+
+def _log(directory, ticks=200):
+    tel = telemetry.Telemetry(directory=str(directory), flush_seconds=60)
+    sim = Simulation(seed=2)
+    for _ in range(ticks):
+        tel.log(sim, sim.step(TickInput(jump=sim.tick % 20 == 0)))
+    tel.close()
+    return tel
+
+
+def test_load_skips_short_and_foreign_files(tmp_path):
+    _log(tmp_path)
+    good = telemetry.load(tmp_path)
+    assert good.size and (good['type'] == telemetry.TYPES.index('start')).any()
+    (tmp_path / 'telemetry-00000000-000000-000.bin').write_bytes(b'')
+    (tmp_path / 'telemetry-00000000-000001-000.bin').write_bytes(telemetry.MAGIC[:5])
+    (tmp_path / 'telemetry-00000000-000002-000.bin').write_bytes(b'not a log at all')
+    assert np.array_equal(telemetry.load(tmp_path), good)
+
+
+def test_session_counter_past_16_bits(tmp_path):
+    tel = telemetry.Telemetry(directory=str(tmp_path), flush_seconds=60)
+    tel.session = 70000
+    tel._started = True
+    tel._was_over = True
+    sim = Simulation(seed=2)
+    tel.log(sim, [])
+    tel.close()
+    rec = telemetry.load(tmp_path)
+    assert rec['session'].max() == 70001
+
+
+def test_writers_sharing_a_prefix_keep_their_logs(tmp_path):
+    writers = [telemetry.Telemetry(directory=str(tmp_path), flush_seconds=60) for _ in range(2)]
+    writers[1]._prefix = writers[0]._prefix
+    sim = Simulation(seed=2)
+    for _ in range(100):
+        events = sim.step(TickInput())
+        for tel in writers:
+            tel.log(sim, events)
+    for tel in writers:
+        tel.close()
+    assert len(list(tmp_path.iterdir())) == 2
+    rec = telemetry.load(tmp_path)
+    half = rec.size // 2
+    assert half and (rec['tick'][:half] == rec['tick'][half:]).all()
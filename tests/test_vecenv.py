@@ -0,0 +1,40 @@
+import random
+import numpy as np
+from grass import SPAWN_KINDS, SPAWN_WEIGHTS
+from simulation import Simulation, TickInput
+from vecenv import VecEnv, KINDS, ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_SHOOT, observe_simulation
+
+
+def test_vecenv_matches_simulation():
+    for seed in range(5):
+        sim = Simulation(seed=seed, spawns='rolls')
+        env = VecEnv(1, auto_reset=False)
+        for obj in (sim.spawner, env):
+            obj.wolf_rate = 0.02
+            obj.obstacle_rate = 0.004
+        env.reset()
+        # draw the env's spawns in the same order, from the same seed, as Spawner.maybe_spawn
+        rolls = random.Random(seed)
+
+        def roll(n, sp=sim.spawner):
+            grass = rolls.random() < sp.grass_rate
+            kind = KINDS.index(rolls.choices(SPAWN_KINDS, weights=SPAWN_WEIGHTS)[0]) if grass else 0
+            obstacle = rolls.random() < sp.obstacle_rate
+            wolf = rolls.random() < sp.wolf_rate
+            return np.array([grass]), np.array([kind]), np.array([obstacle]), np.array([wolf])
+        env._roll_spawns = roll
+
+        actions = random.Random(seed + 1000)
+        for _ in range(3000):
+            a = ((actions.random() < 0.3) * ACTION_LEFT | (actions.random() < 0.5) * ACTION_RIGHT
+                 | (actions.random() < 0.15) * ACTION_JUMP | (actions.random() < 0.3) * ACTION_SHOOT)
+            score = sim.score
+            sim.step(TickInput(left=bool(a & ACTION_LEFT), right=bool(a & ACTION_RIGHT),
+                               jump=bool(a & ACTION_JUMP), shots=int(bool(a & ACTION_SHOOT))))
+            obs, rewards, dones, info = env.step(np.array([a]))
+            assert np.array_equal(obs[0], observe_simulation(sim))
+            assert rewards[0] == sim.score - score
+            assert dones[0] == sim.game_over
+            if sim.game_over:
+                break
+        assert sim.game_over
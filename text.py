@@ -0,0 +1,53 @@
+"""Cached text rendering for the HUD.
+
+Font rasterization is slow compared to a blit, and the HUD shows the same
+few strings every frame. TextCache keeps rendered surfaces keyed by font,
+text and colour (least recently used ones are dropped past `size`, across
+all fonts), and builds counters like the score from a cached label plus
+cached per-digit glyphs, recomposing only when the value changes.
+"""
+from collections import OrderedDict
+import pygame
+from config import *
+
+
+class TextCache:
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        self.size = size
+        self._surfaces = OrderedDict()
+        # (font, label, color) -> (value, composed surface)
+        self._counters = {}
+
+    def render(self, font, text, color, antialias=True):
+        """font.render(text, antialias, color), rasterized once."""
+        key = (font, text, color, antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            return surf
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.size:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def counter(self, font, label, value, color):
+        """`label` followed by the integer `value`, laid out from cached glyphs."""
+        key = (font, label, color)
+        last = self._counters.get(key)
+        if last is not None and last[0] == value:
+            return last[1]
+        parts = [self.render(font, label, color)] + [self.render(font, ch, color) for ch in str(value)]
+        surf = pygame.Surface((sum(p.get_width() for p in parts), max(p.get_height() for p in parts)),
+                              pygame.SRCALPHA)
+        x = 0
+        for part in parts:
+            # glyphs don't overlap, so MAX copies each one's colour and alpha unblended
+            surf.blit(part, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += part.get_width()
+        self._counters[key] = (value, surf)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+        self._counters.clear()
@@ -0,0 +1,347 @@
+"""Vectorized Sheep Runner environments for batch agent training.
+
+VecEnv steps N independent games at once with every piece of state in
+NumPy arrays: one row per game for the sheep, and fixed-capacity slot
+arrays per game for collectibles, obstacles, wolves and projectiles. The
+per-tick rules are the ones in Sheep.update, Spawner.maybe_spawn and
+Simulation.step (movement, spawning, culling, pickups and effects, wolf
+kills, deaths), so a policy trained here plays the same game.
+
+    env = VecEnv(256, seed=0)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)   # actions: int array of ACTION_* bits
+
+Rewards are the score gained that tick. Finished games are restarted
+automatically (auto_reset=True); their final observation is in
+info['final_obs'].
+"""
+import numpy as np
+from config import *
+import entities
+from entities import COLLECTIBLE, OBSTACLE, WOLF, PROJECTILE
+from grass import SPAWN_KINDS, SPAWN_WEIGHTS, OBSTACLE_RATE_SCALE
+from simulation import PLAYER_START
+
+# action bits
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_JUMP = 4
+ACTION_SHOOT = 8
+
+# entities.CATEGORY_VX indexed by category
+CATEGORY_VX = np.array([entities.CATEGORY_VX[cat] for cat in (COLLECTIBLE, OBSTACLE, WOLF, PROJECTILE)])
+
+# collectible kinds, spawn weights and pickup multipliers (Spawner / Simulation._pickup)
+KINDS = list(SPAWN_KINDS)
+KIND_WEIGHTS = np.array(SPAWN_WEIGHTS)
+KIND_MULTIPLIER = np.array([2 if k in ('mushroom_pink', 'mushroom_blue') else 1 for k in KINDS])
+IS_MUSHROOM = np.array([k.startswith('mushroom') for k in KINDS])
+WOLF_KILL_POINTS = 5
+
+# death causes reported in info['death_cause']
+CAUSE_NONE = 0
+CAUSE_OBSTACLE = 1
+CAUSE_WOLF = 2
+
+# observation layout; dx/dy are entity top-left minus sheep top-left, NO_ENTITY when none ahead
+OBS_FIELDS = [
+    'sheep_x', 'sheep_y', 'sheep_vx', 'sheep_vy', 'jump_count',
+    'obstacle_dx', 'obstacle_dy',
+    'wolf_dx', 'wolf_dy',
+    'collectible_dx', 'collectible_dy', 'collectible_kind',
+    'game_speed', 'effect',
+]
+OBS_SIZE = len(OBS_FIELDS)
+NO_ENTITY = float(SCREEN_WIDTH * 2)
+
+GROUND_Y = SCREEN_HEIGHT - TILE_SIZE - SHEEP_SIZE
+# spawn geometry per category: x, y, w, h
+SPAWN_RECT = {
+    COLLECTIBLE: (SCREEN_WIDTH + 10, SCREEN_HEIGHT - TILE_SIZE - GRASS_SIZE, GRASS_SIZE, GRASS_SIZE),
+    OBSTACLE: (SCREEN_WIDTH + 20, SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE, OBSTACLE_SIZE, OBSTACLE_SIZE),
+    WOLF: (SCREEN_WIDTH + 40, SCREEN_HEIGHT - TILE_SIZE - OBSTACLE_SIZE, OBSTACLE_SIZE, OBSTACLE_SIZE),
+}
+
+
+def _nearest_ahead(px, x, w, y, py, alive):
+    """(dx, dy, slot) of the closest live entity not yet behind the sheep, per row."""
+    ahead = alive & (x + w >= px[:, None])
+    key = np.where(ahead, x, np.iinfo(np.int64).max)
+    slot = np.argmin(key, axis=1)
+    rows = np.arange(len(px))
+    found = ahead[rows, slot]
+    dx = np.where(found, x[rows, slot] - px, NO_ENTITY)
+    dy = np.where(found, y[rows, slot] - py, 0.0)
+    return dx, dy, slot, found
+
+
+class VecEnv:
+    def __init__(self, num_envs, seed=None, capacity=128, auto_reset=True):
+        self.num_envs = n = num_envs
+        self.capacity = capacity
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        # spawn probabilities per tick (same defaults as Spawner)
+        self.grass_rate = GRASS_SPAWN_RATE
+        self.obstacle_rate = OBSTACLE_SPAWN_RATE * OBSTACLE_RATE_SCALE
+        self.wolf_rate = WOLF_SPAWN_RATE
+        self.speed_increment = SPEED_INCREMENT
+
+        # sheep
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.vx = np.zeros(n)
+        self.vy = np.zeros(n)
+        self.jump_count = np.zeros(n, dtype=np.int64)
+        self.prev_jump = np.zeros(n, dtype=bool)
+        # game
+        self.score = np.zeros(n, dtype=np.int64)
+        self.game_speed = np.zeros(n)
+        self.effect = np.full(n, -1, dtype=np.int64)  # KINDS index, -1 = none
+        self.effect_timer = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        # entities: (num_envs, capacity) slots
+        shape = (n, capacity)
+        self.ex = np.zeros(shape, dtype=np.int64)
+        self.ey = np.zeros(shape, dtype=np.int64)
+        self.ew = np.zeros(shape, dtype=np.int64)
+        self.eh = np.zeros(shape, dtype=np.int64)
+        self.ecat = np.zeros(shape, dtype=np.int8)
+        self.ekind = np.zeros(shape, dtype=np.int8)
+        self.ealive = np.zeros(shape, dtype=bool)
+        # spawn order within a game, for order-dependent rules (last mushroom wins)
+        self.eseq = np.zeros(shape, dtype=np.int64)
+        self._next_seq = np.zeros(n, dtype=np.int64)
+        self.dropped_spawns = 0
+        self._obs = np.zeros((n, OBS_SIZE), dtype=np.float32)
+
+    # -- episode control ---------------------------------------------------
+
+    def reset(self, mask=None):
+        """Start fresh games (all of them, or where `mask` is True); returns observations."""
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        self.x[mask] = PLAYER_START[0]
+        self.y[mask] = PLAYER_START[1]
+        self.vx[mask] = 0
+        self.vy[mask] = 0
+        self.jump_count[mask] = 0
+        self.prev_jump[mask] = False
+        self.score[mask] = 0
+        self.game_speed[mask] = INITIAL_GAME_SPEED
+        self.effect[mask] = -1
+        self.effect_timer[mask] = 0
+        self.game_over[mask] = False
+        self.ticks[mask] = 0
+        self.ealive[mask] = False
+        self._next_seq[mask] = 0
+        return self.observe()
+
+    # -- stepping ----------------------------------------------------------
+
+    def step(self, actions):
+        """Advance every game one tick; returns (obs, rewards, dones, info)."""
+        actions = np.asarray(actions, dtype=np.int64)
+        live = ~self.game_over
+        score_before = self.score.copy()
+        cause = np.zeros(self.num_envs, dtype=np.int64)
+        self.ticks += live
+
+        # shots are fired before the world moves, like Game.process_events
+        shoot = live & ((actions & ACTION_SHOOT) != 0)
+        if shoot.any():
+            rows = np.flatnonzero(shoot)
+            # Projectile: 12x6 rect centred on the sheep's right edge
+            self._spawn(rows, PROJECTILE, self.x[rows] + SHEEP_SIZE - 6,
+                        self.y[rows] + SHEEP_SIZE // 2 - 3, 12, 6)
+
+        # effect timer
+        ticking = live & (self.effect_timer > 0)
+        self.effect_timer[ticking] -= 1
+        self.effect[ticking & (self.effect_timer == 0)] = -1
+
+        self._move_sheep(actions, live)
+        self._spawn_entities(live)
+        self._move_entities(live)
+        self._collide(live, cause)
+
+        self.game_speed[live] += self.speed_increment
+
+        rewards = (self.score - score_before).astype(np.float32)
+        dones = self.game_over.copy()
+        info = {'death_cause': cause, 'score': self.score.copy(), 'ticks': self.ticks.copy()}
+        obs = self.observe()
+        if self.auto_reset and dones.any():
+            info['final_obs'] = obs.copy()
+            obs = self.reset(dones)
+        return obs, rewards, dones, info
+
+    def _move_sheep(self, actions, live):
+        # Sheep.update: horizontal movement, clamp, debounced multi-jump, gravity, ground clamp
+        vx = np.zeros(self.num_envs)
+        vx[(actions & ACTION_LEFT) != 0] = -SHEEP_SPEED
+        vx[(actions & ACTION_RIGHT) != 0] = SHEEP_SPEED
+        new_x = np.trunc(self.x + vx * self.game_speed).astype(np.int64)
+        new_x = np.clip(new_x, 0, SCREEN_WIDTH - SHEEP_SIZE)
+
+        jump = (actions & ACTION_JUMP) != 0
+        jumping = live & jump & ~self.prev_jump & (self.jump_count < MAX_JUMPS)
+        vy = np.where(jumping, float(SHEEP_JUMP_SPEED), self.vy) + GRAVITY
+        new_y = self.y + np.trunc(vy).astype(np.int64)
+        jump_count = self.jump_count + jumping
+        grounded = new_y >= GROUND_Y
+        new_y = np.where(grounded, GROUND_Y, new_y)
+        vy = np.where(grounded, 0.0, vy)
+        jump_count = np.where(grounded, 0, jump_count)
+
+        self.vx = np.where(live, vx, self.vx)
+        self.x = np.where(live, new_x, self.x)
+        self.y = np.where(live, new_y, self.y)
+        self.vy = np.where(live, vy, self.vy)
+        self.jump_count = np.where(live, jump_count, self.jump_count)
+        self.prev_jump = np.where(live, jump, self.prev_jump)
+
+    def _roll_spawns(self, n):
+        """Random draws for one tick: (grass, kind index, obstacle, wolf) per game."""
+        u = self.rng.random((n, 3))
+        kinds = self.rng.choice(len(KINDS), size=n, p=KIND_WEIGHTS)
+        return u[:, 0] < self.grass_rate, kinds, u[:, 1] < self.obstacle_rate, u[:, 2] < self.wolf_rate
+
+    def _spawn_entities(self, live):
+        grass, kinds, obstacle, wolf = self._roll_spawns(self.num_envs)
+        for cat, mask in ((COLLECTIBLE, grass), (OBSTACLE, obstacle), (WOLF, wolf)):
+            rows = np.flatnonzero(mask & live)
+            if rows.size:
+                x, y, w, h = SPAWN_RECT[cat]
+                self._spawn(rows, cat, x, y, w, h, kinds[rows] if cat == COLLECTIBLE else 0)
+
+    def _spawn(self, rows, cat, x, y, w, h, kind=0):
+        # first free slot in each row; full rows drop the spawn
+        slot = np.argmin(self.ealive[rows], axis=1)
+        ok = ~self.ealive[rows, slot]
+        self.dropped_spawns += int(np.count_nonzero(~ok))
+        rows, slot = rows[ok], slot[ok]
+        x = np.broadcast_to(x, ok.shape)[ok]
+        y = np.broadcast_to(y, ok.shape)[ok]
+        kind = np.broadcast_to(kind, ok.shape)[ok]
+        self.ex[rows, slot] = x
+        self.ey[rows, slot] = y
+        self.ew[rows, slot] = w
+        self.eh[rows, slot] = h
+        self.ecat[rows, slot] = cat
+        self.ekind[rows, slot] = kind
+        self.ealive[rows, slot] = True
+        self.eseq[rows, slot] = self._next_seq[rows]
+        self._next_seq[rows] += 1
+
+    def _move_entities(self, live):
+        vx = CATEGORY_VX[self.ecat]
+        moving = self.ealive & live[:, None]
+        dx = np.trunc(vx * self.game_speed[:, None]).astype(np.int64)
+        self.ex += np.where(moving, dx, 0)
+        gone = np.where(vx > 0, self.ex > SCREEN_WIDTH, self.ex + self.ew < 0)
+        self.ealive &= ~(moving & gone)
+
+    def _overlap_player(self, live):
+        px = self.x[:, None]
+        py = self.y[:, None]
+        return (self.ealive & live[:, None]
+                & (self.ex < px + SHEEP_SIZE) & (px < self.ex + self.ew)
+                & (self.ey < py + SHEEP_SIZE) & (py < self.ey + self.eh))
+
+    def _collide(self, live, cause):
+        cat = self.ecat
+        touching = self._overlap_player(live)
+
+        # collectibles: score every hit, the last mushroom in spawn order sets the effect
+        hits = touching & (cat == COLLECTIBLE)
+        if hits.any():
+            kind = self.ekind.astype(np.int64)
+            self.score += np.where(hits, SCORE_PER_GRASS * KIND_MULTIPLIER[kind], 0).sum(axis=1)
+            mush = hits & IS_MUSHROOM[kind]
+            rows = np.flatnonzero(mush.any(axis=1))
+            if rows.size:
+                last = np.argmax(np.where(mush[rows], self.eseq[rows], -1), axis=1)
+                self.effect[rows] = kind[rows, last]
+                self.effect_timer[rows] = TICK_RATE * 3
+            self.ealive &= ~hits
+
+        self._collide_wolves_projectiles(live)
+
+        # deaths (wolves shot this tick no longer count)
+        touching &= self.ealive
+        crashed = (touching & (cat == OBSTACLE)).any(axis=1)
+        caught = (touching & (cat == WOLF)).any(axis=1)
+        cause[caught] = CAUSE_WOLF
+        cause[crashed] = CAUSE_OBSTACLE
+        self.game_over |= crashed | caught
+
+    def _collide_wolves_projectiles(self, live):
+        alive = self.ealive & live[:, None]
+        wolves = alive & (self.ecat == WOLF)
+        shots = alive & (self.ecat == PROJECTILE)
+        candidates = np.flatnonzero(wolves.any(axis=1) & shots.any(axis=1))
+        if not candidates.size:
+            return
+        ex, ey, ew, eh = self.ex[candidates], self.ey[candidates], self.ew[candidates], self.eh[candidates]
+        # (env, wolf slot, projectile slot) overlap
+        hit = ((ex[:, :, None] < ex[:, None, :] + ew[:, None, :])
+               & (ex[:, None, :] < ex[:, :, None] + ew[:, :, None])
+               & (ey[:, :, None] < ey[:, None, :] + eh[:, None, :])
+               & (ey[:, None, :] < ey[:, :, None] + eh[:, :, None]))
+        hit &= wolves[candidates][:, :, None] & shots[candidates][:, None, :]
+        for j in np.flatnonzero(hit.any(axis=(1, 2))):
+            # rare: resolve wolf by wolf in spawn order, like pygame.sprite.groupcollide
+            row = candidates[j]
+            pairs = hit[j]
+            shot_alive = shots[row].copy()
+            for w in sorted(np.flatnonzero(pairs.any(axis=1)), key=lambda s: self.eseq[row, s]):
+                struck = pairs[w] & shot_alive
+                if struck.any():
+                    shot_alive &= ~struck
+                    self.ealive[row, struck] = False
+                    self.ealive[row, w] = False
+                    self.score[row] += WOLF_KILL_POINTS
+
+    # -- observations ------------------------------------------------------
+
+    def observe(self):
+        """(num_envs, OBS_SIZE) float32 observations, laid out as OBS_FIELDS."""
+        obs = self._obs
+        px, py = self.x, self.y
+        obs[:, 0] = px
+        obs[:, 1] = py
+        obs[:, 2] = self.vx
+        obs[:, 3] = self.vy
+        obs[:, 4] = self.jump_count
+        col = 5
+        for cat in (OBSTACLE, WOLF, COLLECTIBLE):
+            dx, dy, slot, found = _nearest_ahead(px, self.ex, self.ew, self.ey, py, self.ealive & (self.ecat == cat))
+            obs[:, col] = dx
+            obs[:, col + 1] = dy
+            col += 2
+        obs[:, 11] = np.where(found, self.ekind[np.arange(self.num_envs), slot], -1)
+        obs[:, 12] = self.game_speed
+        obs[:, 13] = self.effect + 1
+        return obs.copy()
+
+
+def observe_simulation(sim):
+    """The VecEnv observation vector (OBS_FIELDS) for a sprite-backed Simulation."""
+    p = sim.player.rect
+    obs = np.zeros(OBS_SIZE, dtype=np.float32)
+    obs[:5] = (p.x, p.y, sim.player.vx, sim.player.vy, sim.player.jump_count)
+    col = 5
+    nearest = None
+    for group in (sim.obstacle_group, sim.wolf_group, sim.collectible_group):
+        nearest = min((s for s in group if s.rect.right >= p.x), key=lambda s: s.rect.x, default=None)
+        if nearest is None:
+            obs[col:col + 2] = (NO_ENTITY, 0.0)
+        else:
+            obs[col:col + 2] = (nearest.rect.x - p.x, nearest.rect.y - p.y)
+        col += 2
+    obs[11] = KINDS.index(nearest.kind) if nearest is not None else -1
+    obs[12] = sim.game_speed
+    obs[13] = KINDS.index(sim.effect) + 1 if sim.effect else 0
+    return obs